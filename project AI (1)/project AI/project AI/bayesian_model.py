@@ -1,6 +1,16 @@
+from itertools import product
+
+import numpy as np
 from pgmpy.models import DiscreteBayesianNetwork
 from pgmpy.factors.discrete import TabularCPD
-from pgmpy.inference import VariableElimination
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; run the kernel as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 # Create the Bayesian model with proper structure
 model = DiscreteBayesianNetwork([
@@ -51,18 +61,59 @@ model.add_cpds(cpd_fever, cpd_cough, cpd_fatigue, cpd_flu, cpd_covid, cpd_cold)
 # Verify the model
 assert model.check_model()
 
-# Inference
-inference = VariableElimination(model)
+DISEASES = ('Flu', 'COVID', 'Cold')
+SYMPTOMS = ('Fever', 'Cough', 'Fatigue')
+
+# Frozen CPTs as contiguous float64 arrays for the inference kernel
+symptom_priors = np.ascontiguousarray(
+    [cpd.values for cpd in (cpd_fever, cpd_cough, cpd_fatigue)], dtype=np.float64
+)
+disease_cpts = np.ascontiguousarray(
+    [cpd.values[1] for cpd in (cpd_flu, cpd_covid, cpd_cold)], dtype=np.float64
+)
+
+@njit(cache=True)
+def _marginal(fever, cough, fatigue, symptom_priors, disease_cpts):
+    """P(Disease=1 | evidence) for every disease; -1 marks an unobserved symptom."""
+    result = np.zeros(disease_cpts.shape[0])
+    norm = 0.0
+    for f in range(2):
+        if fever >= 0 and f != fever:
+            continue
+        for c in range(2):
+            if cough >= 0 and c != cough:
+                continue
+            for fa in range(2):
+                if fatigue >= 0 and fa != fatigue:
+                    continue
+                weight = symptom_priors[0, f] * symptom_priors[1, c] * symptom_priors[2, fa]
+                norm += weight
+                for d in range(disease_cpts.shape[0]):
+                    result[d] += weight * disease_cpts[d, f, c, fa]
+    return result / norm
+
+def _format_probabilities(probs):
+    return {
+        disease: round(float(prob) * 100, 2)
+        for disease, prob in zip(DISEASES, probs)
+    }
+
+# Precompute the formatted result for every full evidence row once (this also
+# compiles the kernel), so a full diagnosis is a single dict lookup.
+_TABLE = {
+    values: _format_probabilities(_marginal(*values, symptom_priors, disease_cpts))
+    for values in product([0, 1], repeat=len(SYMPTOMS))
+}
 
 # 🔮 Function to calculate probabilities
 def predict_disease_probabilities(symptom_values):
-    diseases = ['Flu', 'COVID', 'Cold']
-    result = {}
-    for disease in diseases:
-        query = inference.query(variables=[disease], evidence=symptom_values)
-        prob = query.values[1]  # Probability of disease = True
-        result[disease] = round(prob * 100, 2)
-    return result
+    try:
+        key = (int(symptom_values['Fever']), int(symptom_values['Cough']), int(symptom_values['Fatigue']))
+    except KeyError:
+        # Partial evidence: marginalize the missing symptoms with the kernel
+        values = tuple(int(symptom_values.get(symptom, -1)) for symptom in SYMPTOMS)
+        return _format_probabilities(_marginal(*values, symptom_priors, disease_cpts))
+    return dict(_TABLE[key])
 
 # 🧪 Test the model
 if __name__ == "__main__":
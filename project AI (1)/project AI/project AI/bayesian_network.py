@@ -1,10 +1,21 @@
 from pgmpy.models import DiscreteBayesianNetwork
 from pgmpy.factors.discrete import TabularCPD
 from pgmpy.inference import VariableElimination
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Set, Tuple
 import numpy as np
+import os
+
+# Querying all diseases together materializes their joint (2^n entries), so
+# diagnose() only batches them into a single query up to this many diseases.
+MAX_JOINT_QUERY_DISEASES = 12
 
 class MedicalBayesianNetwork:
+    __slots__ = (
+        'model', 'symptoms', 'diseases', 'inference_engine',
+        'disease_symptom_map', '_diagnosis_cache', '_pool'
+    )
+
     def __init__(self):
         """Initialize an empty Bayesian Network for medical diagnosis."""
         self.model = DiscreteBayesianNetwork()
@@ -12,6 +23,9 @@ class MedicalBayesianNetwork:
         self.diseases: Set[str] = set()
         self.inference_engine = None
         self.disease_symptom_map = {}
+        self._pool = None
+        # Diagnosis results keyed by the frozen evidence they were computed for
+        self._diagnosis_cache: Dict[frozenset, Dict[str, float]] = {}
 
     def add_disease_symptoms(self, disease: str, symptoms: List[str], 
                            base_probability: float = 0.01):
@@ -55,10 +69,15 @@ class MedicalBayesianNetwork:
                 self.model.add_cpds(disease_cpd)
 
             # Add CPDs for symptoms
+            # Set views of each disease's symptoms for constant-time membership tests
+            symptom_sets = {
+                disease: frozenset(symptoms)
+                for disease, symptoms in self.disease_symptom_map.items()
+            }
             for symptom in self.symptoms:
                 # Find all diseases that cause this symptom
                 related_diseases = [
-                    disease for disease, symptoms in self.disease_symptom_map.items()
+                    disease for disease, symptoms in symptom_sets.items()
                     if symptom in symptoms
                 ]
                 
@@ -70,18 +89,13 @@ class MedicalBayesianNetwork:
                 n_states = 2 ** n_diseases
                 
                 # Create probability table
-                # Default probability of symptom when no disease is present
-                prob_table = np.zeros((2, n_states))
-                prob_table[0] = 0.9  # Probability of symptom being absent
-                prob_table[1] = 0.1  # Probability of symptom being present
-                
-                # Adjust probabilities based on disease presence
-                for i in range(1, n_states):
-                    # More diseases present = higher probability of symptom
-                    n_diseases_present = bin(i).count('1')
-                    prob_present = min(0.1 + 0.8 * (n_diseases_present / n_diseases), 0.99)
-                    prob_table[1, i] = prob_present
-                    prob_table[0, i] = 1 - prob_present
+                # Count the diseases present in every parent-state column at once;
+                # with none present the symptom keeps its 0.1 base probability.
+                states = np.arange(n_states)
+                n_diseases_present = ((states[:, None] >> np.arange(n_diseases)) & 1).sum(axis=1)
+                # More diseases present = higher probability of symptom
+                prob_present = np.minimum(0.1 + 0.8 * (n_diseases_present / n_diseases), 0.99)
+                prob_table = np.vstack([1 - prob_present, prob_present])
 
                 symptom_cpd = TabularCPD(
                     variable=symptom,
@@ -92,8 +106,12 @@ class MedicalBayesianNetwork:
                 )
                 self.model.add_cpds(symptom_cpd)
 
-            self.model.check_model()
+            # CPDs are normalized by construction; validate only when debugging
+            if __debug__ and os.environ.get("MDS_VALIDATE"):
+                self.model.check_model()
             self.inference_engine = VariableElimination(self.model)
+            self._diagnosis_cache.clear()
+            self._start_pool()
             print("Bayesian Network built successfully!")
             
         except Exception as e:
@@ -118,22 +136,78 @@ class MedicalBayesianNetwork:
             symptom: int(present)
             for symptom, present in observed_symptoms.items()
         }
-        
-        results = {}
-        for disease in self.diseases:
+        cache_key = frozenset(evidence.items())
+        cached = self._diagnosis_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+        results = self._query_diseases(evidence)
+        if None not in results.values():
+            self._diagnosis_cache[cache_key] = results
+        return dict(results)
+
+    def _query_diseases(self, evidence: Dict[str, int]) -> Dict[str, float]:
+        """Run the disease queries for an integer evidence dict."""
+        if len(self.diseases) <= MAX_JOINT_QUERY_DISEASES:
             try:
-                query_result = self.inference_engine.query(
-                    variables=[disease],
-                    evidence=evidence
+                # One elimination pass shared by every disease marginal
+                marginals = self.inference_engine.query(
+                    variables=list(self.diseases),
+                    evidence=evidence,
+                    joint=False,
+                    show_progress=False
                 )
+                return {
+                    disease: factor.values[1]
+                    for disease, factor in marginals.items()
+                }
+            except Exception as e:
+                print(f"Error querying diseases jointly: {str(e)}")
+
+        # Disease queries are independent, so run them on the worker pool
+        futures = {
+            disease: self._pool.submit(
+                self.inference_engine.query,
+                variables=[disease],
+                evidence=evidence,
+                show_progress=False
+            )
+            for disease in self.diseases
+        }
+        results = {}
+        for disease, future in futures.items():
+            try:
                 # Get probability of disease being present (state 1)
-                results[disease] = query_result.values[1]
+                results[disease] = future.result().values[1]
             except Exception as e:
                 print(f"Error querying disease {disease}: {str(e)}")
                 results[disease] = None
                 
         return results
 
+    def _start_pool(self):
+        """Start the worker threads for the per-disease queries in diagnose()."""
+        self.close()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(8, len(self.diseases))))
+
+    def __getstate__(self):
+        # Worker threads cannot be pickled; they are restarted on load
+        state = {slot: getattr(self, slot) for slot in self.__slots__}
+        state['_pool'] = None
+        return state
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        if self.inference_engine is not None:
+            self._start_pool()
+
+    def close(self):
+        """Shut down the worker threads used for inference."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
     def get_all_symptoms(self) -> Set[str]:
         """Get all symptoms in the network."""
         return self.symptoms
@@ -63,7 +63,7 @@ def main():
     # Interactive Demo
     print_header("Interactive Diagnosis")
     print("Available symptoms:")
-    all_symptoms = sorted(list(system.bayesian.get_all_symptoms()))
+    all_symptoms = sorted(system.bayesian.get_all_symptoms())
     for i, symptom in enumerate(all_symptoms, 1):
         print(f"{i}. {symptom}")
     
@@ -85,7 +85,7 @@ def main():
         except (ValueError, IndexError) as e:
             print("Invalid input! Please enter valid symptom numbers.")
     
-    system.neo4j.close()
+    system.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
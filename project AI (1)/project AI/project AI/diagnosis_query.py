@@ -1,32 +1,25 @@
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS
+from neo4j_connector import NEO4J_DATABASE, close_driver, get_driver
 
-# Neo4j configuration (same as in neo4j_connector.py)
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "neo4jneo4j"
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# Kept as a constant so the driver sees the exact same query text every call
+DISEASES_BY_SYMPTOMS_QUERY = """
+MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
+WHERE s.name IN $symptoms
+RETURN d.name AS disease, count(s) AS matchedSymptoms
+ORDER BY matchedSymptoms DESC
+"""
 
 
 # Query diseases that match one or more symptoms
 def query_diseases(symptom_list):
-    with driver.session() as session:
-        query = """
-        MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
-        WHERE s.name IN $symptoms
-        RETURN d.name AS disease, count(s) AS matchedSymptoms
-        ORDER BY matchedSymptoms DESC
-        """
-        result = session.run(query, symptoms=symptom_list)
-
-        diseases = []
-        for record in result:
-            diseases.append((record["disease"], record["matchedSymptoms"]))
-        return diseases
+    with get_driver().session(database=NEO4J_DATABASE, default_access_mode=READ_ACCESS) as session:
+        result = session.run(DISEASES_BY_SYMPTOMS_QUERY, symptoms=symptom_list)
+        return [(disease, count) for disease, count in result.values("disease", "matchedSymptoms")]
 
 
 def close_connection():
-    driver.close()
+    close_driver()
 
 
 # 🧪 Test block
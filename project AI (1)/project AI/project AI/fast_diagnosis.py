@@ -9,6 +9,10 @@ NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4jneo4j"
 
+# === KNOWLEDGE EXTRACTION ===
+# Compiled once: "Disease has symptoms Symptom1, Symptom2"
+HAS_PATTERN = re.compile(r'(\w+(?:\s+\w+)*)\s+has\s+symptoms?\s+(.+)', re.IGNORECASE)
+
 # === DRIVER SETUP ===
 driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
@@ -36,8 +40,7 @@ class FastDiagnosisSystem:
         symptoms = []
         
         # Pattern: "Disease has symptoms Symptom1, Symptom2"
-        has_pattern = r'(\w+(?:\s+\w+)*)\s+has\s+symptoms?\s+(.+)'
-        match = re.search(has_pattern, sentence, re.IGNORECASE)
+        match = HAS_PATTERN.search(sentence)
         
         if match:
             disease = match.group(1).strip()
@@ -52,14 +55,15 @@ class FastDiagnosisSystem:
         print("🔍 Processing knowledge...")
         
         for line in knowledge_lines:
-            if line.strip():
-                disease, symptoms = self.extract_entities_and_relationships(line)
-                if disease and symptoms:
-                    self.diseases.add(disease)
-                    for symptom in symptoms:
-                        self.symptoms.add(symptom)
-                    self.disease_symptom_map[disease] = symptoms
-                    print(f"📋 Found: {disease} -> {symptoms}")
+            stripped = line.strip()
+            if not stripped:
+                continue
+            disease, symptoms = self.extract_entities_and_relationships(stripped)
+            if disease and symptoms:
+                self.diseases.add(disease)
+                for symptom in symptoms:
+                    self.symptoms.add(symptom)
+                self.disease_symptom_map[disease] = symptoms
         
         print(f"✅ Extracted {len(self.diseases)} diseases and {len(self.symptoms)} symptoms")
     
@@ -21,6 +21,9 @@ class InteractiveDiagnosisSystem:
         # Build Bayesian network
         self.bayesian_model = self.mds.build_bayesian_network()
         
+        # Symptom menu order never changes after setup, so sort it once
+        self._sorted_symptoms = sorted(self.mds.symptoms)
+        
         print("\n✅ System initialized successfully!")
     
     def clear_screen(self):
@@ -43,8 +46,7 @@ class InteractiveDiagnosisSystem:
         self.clear_screen()
         print("\n📋 Available Symptoms")
         print("=" * 50)
-        sorted_symptoms = sorted(list(self.mds.symptoms))
-        for i, symptom in enumerate(sorted_symptoms, 1):
+        for i, symptom in enumerate(self._sorted_symptoms, 1):
             print(f"{i}. {symptom}")
         input("\nPress Enter to continue...")
     
@@ -55,12 +57,13 @@ class InteractiveDiagnosisSystem:
         print("=" * 50)
         
         # Display symptoms with numbers
-        sorted_symptoms = sorted(list(self.mds.symptoms))
+        sorted_symptoms = self._sorted_symptoms
         for i, symptom in enumerate(sorted_symptoms, 1):
             print(f"{i}. {symptom}")
         
         print("\nEnter symptom numbers (comma-separated) or 'done' to finish:")
-        selected_symptoms = []
+        # dict keeps selection order with O(1) duplicate checks
+        selected_symptoms = {}
         
         while True:
             user_input = input("> ").strip().lower()
@@ -74,14 +77,14 @@ class InteractiveDiagnosisSystem:
                     if 1 <= selection <= len(sorted_symptoms):
                         symptom = sorted_symptoms[selection - 1]
                         if symptom not in selected_symptoms:
-                            selected_symptoms.append(symptom)
+                            selected_symptoms[symptom] = None
                             print(f"Added: {symptom}")
                     else:
                         print(f"Invalid selection: {selection}")
             except ValueError:
                 print("Please enter valid numbers separated by commas.")
         
-        return selected_symptoms
+        return list(selected_symptoms)
     
     def display_diagnosis_results(self, symptoms):
         """Display diagnosis results from both Neo4j and Bayesian analysis"""
@@ -93,10 +96,11 @@ class InteractiveDiagnosisSystem:
         print("-" * 50)
         
         # Get Neo4j results
+        symptom_set = frozenset(symptoms)
         neo4j_results = self.mds.query_diseases_by_symptoms(symptoms)
         for i, result in enumerate(neo4j_results[:5], 1):
             disease = result['disease']
-            matched_symptoms = set(result['symptoms']).intersection(set(symptoms))
+            matched_symptoms = symptom_set.intersection(result['symptoms'])
             print(f"\n{i}. {disease}")
             print(f"   Matching symptoms: {', '.join(matched_symptoms)}")
         
@@ -104,10 +108,10 @@ class InteractiveDiagnosisSystem:
         print("-" * 50)
         
         # Prepare evidence for Bayesian network
-        evidence = {}
-        all_symptoms = list(self.mds.symptoms)
-        for symptom in all_symptoms:
-            evidence[symptom] = 1 if symptom in symptoms else 0
+        evidence = {
+            symptom: int(symptom in symptom_set)
+            for symptom in self.mds.symptoms
+        }
         
         # Get Bayesian network results
         bayesian_results = self.mds.diagnose_with_bayesian_network(
@@ -1,20 +1,23 @@
 from nlp_parser import extract_disease_and_symptoms
-from neo4j_connector import create_disease_symptom_relationship, close_driver
+from neo4j_connector import create_disease_symptom_relationships, close_driver
 
 
 def load_knowledge(file_path):
     with open(file_path, 'r') as file:
         lines = file.readlines()
 
+    rows = []
     for line in lines:
         disease, symptoms = extract_disease_and_symptoms(line)
         if disease and symptoms:
-            for symptom in symptoms:
-                create_disease_symptom_relationship(disease, symptom)
-                print(f"Added: {disease} -> {symptom}")
+            rows.extend({"d": disease, "s": symptom} for symptom in symptoms)
         else:
             print(f"Skipped invalid line: {line.strip()}")
 
+    if rows:
+        create_disease_symptom_relationships(rows)
+    print(f"Added {len(rows)} disease -> symptom relationships")
+
 
 if __name__ == "__main__":
     # Path to your knowledge file
@@ -1,11 +1,20 @@
 from neo4j_loader import Neo4jLoader
+from neo4j_connector import close_driver
 from nlp_parser import MedicalKnowledgeParser
 from bayesian_network import MedicalBayesianNetwork
 from typing import List, Dict
+import hashlib
 import os
+import pickle
 from dotenv import load_dotenv
 
+# Part of the knowledge cache key; bump whenever what gets pickled changes shape
+# (MedicalBayesianNetwork's slots, CPD parameters, or the cached tuple itself)
+KB_CACHE_VERSION = 1
+
 class MedicalDiagnosisSystem:
+    __slots__ = ('neo4j', 'parser', 'bayesian')
+
     def __init__(self):
         """Initialize the medical diagnosis system components."""
         self.neo4j = Neo4jLoader()
@@ -21,10 +30,23 @@ class MedicalDiagnosisSystem:
         """
         print("Loading knowledge base...")
         
+        # Schema first: constraints can't share a transaction with the writes
+        self.neo4j.create_constraints()
+        
         # Clear existing data
         self.neo4j.clear_database()
         
-        # Read and process each line
+        # Reuse the parsed knowledge and built network if the file is unchanged
+        cache_file = self._knowledge_cache_path(filename)
+        cached = self._load_knowledge_cache(cache_file)
+        if cached is not None:
+            pairs, self.bayesian = cached
+            self.neo4j.bulk_create_disease_symptoms(pairs)
+            print("Knowledge base loaded from cache!")
+            return
+        
+        # Read and process each line, collecting Neo4j writes for one transaction
+        pairs = []
         with open(filename, 'r') as f:
             for line in f:
                 line = line.strip()
@@ -34,15 +56,47 @@ class MedicalDiagnosisSystem:
                 # Parse the line
                 disease, symptoms = self.parser.extract_entities_relations(line)
                 if disease and symptoms:
-                    # Add to Neo4j
-                    self.neo4j.create_disease_symptom(disease, symptoms)
+                    pairs.append((disease, symptoms))
                     # Add to Bayesian Network
                     self.bayesian.add_disease_symptoms(disease, symptoms)
         
+        # Add to Neo4j
+        self.neo4j.bulk_create_disease_symptoms(pairs)
+        
         # Build the Bayesian Network
         self.bayesian.build_network()
+        self._save_knowledge_cache(cache_file, (pairs, self.bayesian))
         print("Knowledge base loaded successfully!")
 
+    @staticmethod
+    def _knowledge_cache_path(filename: str) -> str:
+        """Path of the pickle cache for the current contents of a knowledge file."""
+        digest = hashlib.sha256(repr((KB_CACHE_VERSION, MedicalBayesianNetwork.__slots__)).encode('utf-8'))
+        with open(filename, 'rb') as f:
+            digest.update(f.read())
+        return os.path.join(os.path.dirname(filename), f".kb_{digest.hexdigest()}.pkl")
+
+    @staticmethod
+    def _load_knowledge_cache(cache_file: str):
+        """Return the cached (pairs, network), or None on a miss; an unreadable cache is deleted."""
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Discarding unreadable knowledge cache {cache_file}: {e}")
+            os.remove(cache_file)
+            return None
+
+    @staticmethod
+    def _save_knowledge_cache(cache_file: str, data):
+        """Write the cache atomically so an interrupted dump never leaves a partial pickle."""
+        tmp_file = f"{cache_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_file, cache_file)
+
     def diagnose_patient(self, symptoms: List[str], threshold: float = 0.5) -> Dict:
         """
         Diagnose patient based on observed symptoms using both Neo4j and Bayesian inference.
@@ -57,15 +111,12 @@ class MedicalDiagnosisSystem:
         # Get matching diseases from Neo4j (knowledge graph approach)
         graph_matches = self.neo4j.get_diseases_by_symptoms(symptoms, threshold)
         
-        # Prepare symptoms for Bayesian inference
+        # Prepare symptoms for Bayesian inference: only the reported symptoms
+        # are evidence; unreported ones stay unobserved rather than absent
+        known_symptoms = self.bayesian.get_all_symptoms()
         observed_symptoms = {
-            symptom: True for symptom in symptoms
+            symptom: True for symptom in symptoms if symptom in known_symptoms
         }
-        # Add known absent symptoms (from all possible symptoms)
-        all_symptoms = self.bayesian.get_all_symptoms()
-        for symptom in all_symptoms:
-            if symptom not in symptoms:
-                observed_symptoms[symptom] = False
         
         # Get disease probabilities from Bayesian network
         probabilistic_matches = self.bayesian.diagnose(observed_symptoms)
@@ -83,6 +134,8 @@ class MedicalDiagnosisSystem:
     def close(self):
         """Clean up resources."""
         self.neo4j.close()
+        self.bayesian.close()
+        close_driver()
 
 def main():
     """Main function to demonstrate the system."""
@@ -1,48 +1,104 @@
-import spacy
+import hashlib
+import os
+import pickle
 import re
-from neo4j import GraphDatabase
+from collections import Counter
+from operator import itemgetter
+from neo4j_connector import NEO4J_DATABASE, chunked, close_driver, get_driver
 from pgmpy.models import DiscreteBayesianNetwork
 from pgmpy.factors.discrete import TabularCPD
 from pgmpy.inference import VariableElimination
+import numpy as np
 import pandas as pd
 
-# === CONFIGURATION ===
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "neo4jneo4j"
+# === MODEL CACHE ===
+# Parsed knowledge + built Bayesian network, keyed by the knowledge file's hash
+MODEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mds")
+# Bump whenever the pickled tuple changes shape
+MODEL_CACHE_VERSION = 3
 
-# === DRIVER SETUP ===
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# === KNOWLEDGE FILE ===
+# Large read buffer for streaming the knowledge file sequentially
+KNOWLEDGE_READ_BUFFER = 1 << 20
 
-# === NLP SETUP ===
-print("🔄 Loading spaCy model...")
-nlp = spacy.load("en_core_web_sm")
-print("✅ spaCy model loaded successfully!")
+# === BAYESIAN NETWORK PARAMETERS ===
+# 1% chance of having any given disease
+DISEASE_PRIOR = 0.01
+# The probability of the symptom being present, even if no parent disease is active.
+# This represents other causes or random occurrence.
+LEAK_PROBABILITY = 0.05
+# Probability of symptom being present if a single parent disease is active.
+PROB_SYMPTOM_IF_DISEASE = 0.85
+# Largest parent set given a full CPT; symptoms with more parent diseases are
+# split into noisy-OR groups so no table grows past 2^MAX_CPD_PARENTS columns.
+MAX_CPD_PARENTS = 8
+# Quickscore sums over every subset of the present symptoms with alternating
+# signs, so its cost doubles per present symptom and cancellation eats its
+# precision: it matches VariableElimination exactly up to 8 present symptoms
+# and drifts beyond that, so larger observations run VariableElimination on
+# the model instead. Subsets are summed in chunks of QUICKSCORE_CHUNK rows to
+# keep memory flat.
+QUICKSCORE_MAX_PRESENT = 8
+QUICKSCORE_CHUNK = 1 << 12
+
+# === KNOWLEDGE EXTRACTION ===
+# This single regex is more robust and handles different phrasing and complex names.
+# It captures the disease name (group 1) and the symptoms string (group 2).
+SYMPTOM_PATTERN = re.compile(r'^(.*?)\s+(?:has symptoms|symptoms include)\s+(.*)', re.IGNORECASE)
+
+class _KnowledgeLine(str):
+    """A knowledge file line that remembers its byte span (line ending excluded)"""
+    span = None
 
 class MedicalDiagnosisSystem:
     def __init__(self):
         self.diseases = set()
         self.symptoms = set()
         self.disease_symptom_map = {}
+        # Sorted views and statistics for the UI, rebuilt only when knowledge is (re)loaded
+        self.sorted_diseases = []
+        self.sorted_symptoms = []
+        self.symptom_frequency = Counter()
+        self.disease_symptom_counts = []
+        # Byte span of each disease's line in the knowledge file, so edits
+        # can patch that line instead of rewriting the whole file
+        self._knowledge_file = None
+        self._line_offsets = {}
+        self._tombstones = 0
         
     def read_knowledge_file(self, filename='project AI/knowledge.txt'):
         """Read knowledge from text file"""
         print("📖 Reading knowledge from file...")
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                knowledge = file.readlines()
+            knowledge = list(self.iter_knowledge_file(filename))
             print(f"✅ Successfully read {len(knowledge)} lines from {filename}")
             return knowledge
         except FileNotFoundError:
             print(f"❌ File {filename} not found!")
             return []
     
+    def iter_knowledge_file(self, filename='project AI/knowledge.txt'):
+        """
+        Stream knowledge lines from text file without loading it whole.
+        
+        Each line carries its byte span, so process_knowledge can record where
+        every disease lives from the parse it already does.
+        """
+        self._knowledge_file = filename
+        self._line_offsets = {}
+        self._tombstones = 0
+        offset = 0
+        with open(filename, 'rb', buffering=KNOWLEDGE_READ_BUFFER) as file:
+            for raw_line in file:
+                line = _KnowledgeLine(raw_line.decode('utf-8'))
+                line.span = (offset, offset + len(raw_line.rstrip(b'\r\n')))
+                offset += len(raw_line)
+                yield line
+    
     def extract_entities_and_relationships(self, sentence):
         """Extract diseases and symptoms from a sentence using a robust regex."""
-        # This single regex is more robust and handles different phrasing and complex names.
-        # It captures the disease name (group 1) and the symptoms string (group 2).
-        pattern = re.compile(r'^(.*?)\s+(?:has symptoms|symptoms include)\s+(.*)', re.IGNORECASE)
-        match = pattern.search(sentence.strip())
+        # Trailing whitespace ends up in group 2, which is stripped below
+        match = SYMPTOM_PATTERN.match(sentence.lstrip())
         
         if match:
             # The disease is everything before "has symptoms"
@@ -60,49 +116,93 @@ class MedicalDiagnosisSystem:
         print("🔍 Processing knowledge with NLP...")
         
         for i, line in enumerate(knowledge_lines):
-            if line.strip():
-                disease, symptoms = self.extract_entities_and_relationships(line)
-                if disease and symptoms:
-                    self.diseases.add(disease)
-                    for symptom in symptoms:
-                        self.symptoms.add(symptom)
-                    self.disease_symptom_map[disease] = symptoms
-                    if i < 5:  # Show first 5 for progress
-                        print(f"📋 Found: {disease} -> {symptoms}")
+            stripped = line.strip()
+            if not stripped:
+                # Blank file lines are tombstones left by earlier edits; counting
+                # them lets compaction see the waste from previous sessions too
+                if getattr(line, 'span', None) is not None:
+                    self._tombstones += 1
+                continue
+            disease, symptoms = self.extract_entities_and_relationships(stripped)
+            if disease and symptoms:
+                if disease in self.disease_symptom_map:
+                    # Merge repeated disease lines, keeping first-seen symptom order
+                    # (CPD parent order follows it). No single span covers the
+                    # disease any more, so its edits fall back to a full rewrite.
+                    symptoms = list(dict.fromkeys(self.disease_symptom_map[disease] + symptoms))
+                    self._line_offsets.pop(disease, None)
+                else:
+                    # Lines streamed from the knowledge file know where they are
+                    span = getattr(line, 'span', None)
+                    if span is not None:
+                        self._line_offsets[disease] = span
+                self.diseases.add(disease)
+                for symptom in symptoms:
+                    self.symptoms.add(symptom)
+                self.disease_symptom_map[disease] = symptoms
+                if i < 5:  # Show first 5 for progress
+                    print(f"📋 Found: {disease} -> {symptoms}")
         
+        self._derive_knowledge_views()
         print(f"✅ Extracted {len(self.diseases)} diseases and {len(self.symptoms)} symptoms")
     
+    def _derive_knowledge_views(self):
+        """Refresh the sorted lists and statistics derived from the knowledge"""
+        self.sorted_diseases = sorted(self.diseases)
+        self.sorted_symptoms = sorted(self.symptoms)
+        self.symptom_frequency = Counter(s for symptoms in self.disease_symptom_map.values() for s in symptoms)
+        self.disease_symptom_counts = sorted(
+            ((d, len(s)) for d, s in self.disease_symptom_map.items()),
+            key=itemgetter(1), reverse=True
+        )
+    
     def create_neo4j_nodes_and_relationships(self):
         """Create nodes and relationships in Neo4j"""
         print("🗄️ Creating Neo4j knowledge graph...")
         
-        with driver.session() as session:
-            # Clear existing data
-            session.run("MATCH (n) DETACH DELETE n")
-            print("🧹 Cleared existing data")
-            
-            # Create disease and symptom nodes
-            for disease in self.diseases:
-                session.run("""
-                    CREATE (d:Disease {name: $disease})
-                """, disease=disease)
-            
-            for symptom in self.symptoms:
-                session.run("""
-                    CREATE (s:Symptom {name: $symptom})
-                """, symptom=symptom)
+        diseases = [{"name": disease} for disease in self.diseases]
+        symptoms = [{"name": symptom} for symptom in self.symptoms]
+        edges = [
+            {"d": disease, "s": symptom}
+            for disease, disease_symptoms in self.disease_symptom_map.items()
+            for symptom in disease_symptoms
+        ]
+        
+        with get_driver().session(database=NEO4J_DATABASE) as session:
+            # Unique names; the backing indexes make the relationship MATCHes
+            # lookups, not label scans (schema changes can't share a
+            # transaction with data writes)
+            session.run("CREATE CONSTRAINT disease_name IF NOT EXISTS FOR (d:Disease) REQUIRE d.name IS UNIQUE")
+            session.run("CREATE CONSTRAINT symptom_name IF NOT EXISTS FOR (s:Symptom) REQUIRE s.name IS UNIQUE")
             
-            # Create relationships
-            for disease, symptoms in self.disease_symptom_map.items():
-                for symptom in symptoms:
-                    session.run("""
-                        MATCH (d:Disease {name: $disease})
-                        MATCH (s:Symptom {name: $symptom})
-                        CREATE (d)-[:HAS_SYMPTOM]->(s)
-                    """, disease=disease, symptom=symptom)
+            # Clear existing data and recreate the graph in a single commit
+            session.execute_write(self._create_graph, diseases, symptoms, edges)
+            print("🧹 Cleared existing data")
             
             print(f"✅ Created {len(self.diseases)} disease nodes, {len(self.symptoms)} symptom nodes, and relationships")
     
+    @staticmethod
+    def _create_graph(tx, diseases, symptoms, edges):
+        """Replace the graph with disease nodes, symptom nodes and HAS_SYMPTOM edges in one transaction"""
+        tx.run("MATCH (n) DETACH DELETE n")
+        for batch in chunked(diseases):
+            tx.run("""
+                UNWIND $rows AS r
+                CREATE (:Disease {name: r.name})
+            """, rows=batch)
+        for batch in chunked(symptoms):
+            tx.run("""
+                UNWIND $rows AS r
+                CREATE (:Symptom {name: r.name})
+            """, rows=batch)
+        for batch in chunked(edges):
+            tx.run("""
+                UNWIND $rows AS r
+                MATCH (d:Disease {name: r.d})
+                MATCH (s:Symptom {name: r.s})
+                CREATE (d)-[:HAS_SYMPTOM]->(s)
+            """, rows=batch)
+    
     def build_bayesian_network(self):
         """Build a causal Bayesian Network (Disease -> Symptom)"""
         print("🧠 Building Causal Bayesian Network...")
@@ -121,76 +221,80 @@ class MedicalDiagnosisSystem:
             cpd = TabularCPD(
                 variable=disease,
                 variable_card=2,
-                values=[[0.99], [0.01]]  # 1% chance of having any given disease
+                values=[[1 - DISEASE_PRIOR], [DISEASE_PRIOR]]
             )
             model.add_cpds(cpd)
             
         # 2. Symptom conditional probabilities
+        # Reverse index: symptom -> diseases that cause it, built in one pass
+        symptom_to_diseases = {}
+        for disease, s_list in self.disease_symptom_map.items():
+            for symptom in dict.fromkeys(s_list):
+                symptom_to_diseases.setdefault(symptom, []).append(disease)
+        
         for symptom in self.symptoms:
             # Find all diseases that cause this symptom
-            parent_diseases = [d for d, s_list in self.disease_symptom_map.items() if symptom in s_list]
+            parent_diseases = symptom_to_diseases.get(symptom, [])
             
             if not parent_diseases:
                 # Symptom with no parent disease (unlikely but handle it)
                 cpd = TabularCPD(variable=symptom, variable_card=2, values=[[0.95], [0.05]])
                 model.add_cpds(cpd)
                 continue
-
-            # This defines P(Symptom | Disease1, Disease2, ...)
-            variable_card = 2
-            evidence = parent_diseases
-            evidence_card = [2] * len(parent_diseases)
-            
-            # Probability table:
-            # P(Symptom=True | combination of parent diseases)
-            # We use a noisy-OR model logic here.
-            
-            num_states = 2 ** len(parent_diseases)
-            prob_symptom_true_values = []
             
-            # The probability of the symptom being present, even if no parent disease is active.
-            # This represents other causes or random occurrence.
-            leak_probability = 0.05 
-
-            # Probability of symptom being present if a single parent disease is active.
-            prob_symptom_if_disease = 0.85
+            if len(parent_diseases) <= MAX_CPD_PARENTS:
+                model.add_cpds(self._noisy_or_cpd(
+                    symptom, parent_diseases, PROB_SYMPTOM_IF_DISEASE, LEAK_PROBABILITY
+                ))
+                continue
             
-            for i in range(num_states):
-                # Convert i to its binary representation to get parent states
-                parent_states = [int(bit) for bit in format(i, f'0{len(parent_diseases)}b')]
-                
-                # Noisy-OR calculation:
-                # 1 - Product_{d_i=true} (1 - P(S|d_i)) * (1 - leak)
-                
-                # Start with probability of NOT having the symptom if no diseases are present
-                prob_not_symptom = 1.0 - leak_probability
-                
-                for is_present, disease in zip(parent_states, parent_diseases):
-                    if is_present:
-                        # If a disease is present, it reduces the probability of the symptom being absent
-                        prob_not_symptom *= (1.0 - prob_symptom_if_disease)
-                
-                prob_symptom_true = 1.0 - prob_not_symptom
-                prob_symptom_true_values.append(prob_symptom_true)
-
-            values = [
-                [1 - p for p in prob_symptom_true_values], # P(Symptom=False | ...)
-                prob_symptom_true_values                  # P(Symptom=True | ...)
-            ]
-            
-            cpd = TabularCPD(
-                variable=symptom,
-                variable_card=variable_card,
-                values=values,
-                evidence=evidence,
-                evidence_card=evidence_card
-            )
-            model.add_cpds(cpd)
+            # Too many parents for a full table: route each group of diseases
+            # through a leak-free noisy-OR intermediate node, then combine the
+            # groups with a leaky OR. The product of the groups' "no symptom"
+            # probabilities is exactly the original noisy-OR.
+            model.remove_edges_from([(disease, symptom) for disease in parent_diseases])
+            groups = []
+            for start in range(0, len(parent_diseases), MAX_CPD_PARENTS):
+                group = f"{symptom}__group{start // MAX_CPD_PARENTS}"
+                group_parents = parent_diseases[start:start + MAX_CPD_PARENTS]
+                model.add_edges_from([(disease, group) for disease in group_parents])
+                model.add_edge(group, symptom)
+                model.add_cpds(self._noisy_or_cpd(group, group_parents, PROB_SYMPTOM_IF_DISEASE, 0.0))
+                groups.append(group)
+            model.add_cpds(self._noisy_or_cpd(symptom, groups, 1.0, LEAK_PROBABILITY))
 
         print(f"✅ Built Bayesian Network with {len(model.edges())} edges and {len(model.cpds)} CPDs")
-        model.check_model() # Verify the model is valid
+        # The noisy-OR CPDs are normalized by construction; full validation
+        # is a debugging aid, enabled with MDS_VALIDATE=1
+        if __debug__ and os.environ.get("MDS_VALIDATE"):
+            model.check_model() # Verify the model is valid
         return model
     
+    @staticmethod
+    def _noisy_or_cpd(variable, parents, prob_if_parent, leak):
+        """P(variable | parents) under noisy-OR, as a TabularCPD"""
+        # This defines P(variable | Parent1, Parent2, ...)
+        n_parents = len(parents)
+        num_states = 2 ** n_parents
+        
+        # Parent states as a bit matrix, one row per CPD column (first parent = MSB)
+        parent_states = (np.arange(num_states)[:, None] >> np.arange(n_parents - 1, -1, -1)) & 1
+        
+        # Noisy-OR calculation:
+        # 1 - Product_{d_i=true} (1 - P(S|d_i)) * (1 - leak)
+        prob_false = (1.0 - leak) * np.prod(1.0 - parent_states * prob_if_parent, axis=1)
+        
+        return TabularCPD(
+            variable=variable,
+            variable_card=2,
+            values=np.stack([
+                prob_false,        # P(variable=False | ...)
+                1.0 - prob_false   # P(variable=True | ...)
+            ]),
+            evidence=list(parents),
+            evidence_card=[2] * n_parents
+        )
+    
     def add_knowledge_to_file(self, disease, symptoms, filename='project AI/knowledge.txt'):
         """Appends a new disease and its symptoms to the knowledge file."""
         print(f"✍️ Adding new knowledge to {filename}: {disease}")
@@ -205,6 +309,13 @@ class MedicalDiagnosisSystem:
             print(f"❌ Failed to write to {filename}: {e}")
             raise e
     
+    @staticmethod
+    def _format_knowledge_line(disease, symptoms):
+        """Format a knowledge line as "Disease has symptoms Symptom1, Symptom2"."""
+        # Clean up symptoms to ensure no extra whitespace
+        cleaned_symptoms = [s.strip() for s in symptoms]
+        return f"{disease.strip()} has symptoms {', '.join(cleaned_symptoms)}."
+    
     def _rewrite_knowledge_file(self, filename='project AI/knowledge.txt'):
         """Rewrites the entire knowledge file from the current disease_symptom_map, ensuring clean and consistent formatting."""
         print("🔄 Rewriting knowledge file with current data...")
@@ -212,39 +323,86 @@ class MedicalDiagnosisSystem:
         # Sort diseases alphabetically for consistency
         sorted_diseases = sorted(self.disease_symptom_map.keys())
         
+        # Spans of the lines as written, so later edits can patch them in place
         lines_to_write = []
+        offsets = {}
+        offset = 0
         for disease in sorted_diseases:
             symptoms = self.disease_symptom_map[disease]
             if disease and symptoms:
-                # Standardize the format: "Disease has symptoms Symptom1, Symptom2."
-                # Clean up symptoms to ensure no extra whitespace
-                cleaned_symptoms = [s.strip() for s in symptoms]
-                line = f"{disease.strip()} has symptoms {', '.join(cleaned_symptoms)}."
-                lines_to_write.append(line)
+                data = self._format_knowledge_line(disease, symptoms).encode('utf-8')
+                lines_to_write.append(data)
+                offsets[disease] = (offset, offset + len(data))
+                offset += len(data) + 1
         
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                file.write("\n".join(lines_to_write))
+            with open(filename, 'wb') as file:
+                file.write(b"\n".join(lines_to_write))
+            self._knowledge_file = filename
+            self._line_offsets = offsets
+            self._tombstones = 0
             print("✅ Knowledge file successfully rewritten with standardized format.")
         except Exception as e:
             print(f"❌ Failed to rewrite knowledge file: {e}")
             raise e
+    
+    def _edit_knowledge_line(self, disease, new_line):
+        """
+        Replace (or with new_line=None, blank out) a disease's line in place.
+        
+        A line that still fits is overwritten and padded with spaces; a longer
+        one is appended and the old line is blanked. Blank lines are skipped
+        when reading, and the file is compacted once they outnumber live ones.
+        Returns False if the line's position is unknown.
+        """
+        span = self._line_offsets.pop(disease, None)
+        if span is None:
+            return False
+        
+        start, end = span
+        old_length = end - start
+        data = new_line.encode('utf-8') if new_line else b''
+        
+        with open(self._knowledge_file, 'r+b') as file:
+            file.seek(start)
+            if len(data) <= old_length:
+                file.write(data.ljust(old_length))
+                if data:
+                    self._line_offsets[disease] = (start, start + len(data))
+            else:
+                file.write(b' ' * old_length)
+                # Start a new line unless the file already ends with one
+                end_of_file = file.seek(0, os.SEEK_END)
+                file.seek(end_of_file - 1)
+                separator = b'' if file.read(1) == b'\n' else b'\n'
+                file.write(separator + data)
+                new_start = end_of_file + len(separator)
+                self._line_offsets[disease] = (new_start, new_start + len(data))
+        
+        if not data or len(data) > old_length:
+            self._tombstones += 1
+        if self._tombstones > len(self._line_offsets):
+            self._rewrite_knowledge_file(self._knowledge_file)
+        return True
             
     def update_knowledge(self, disease_to_update, new_symptoms):
-        """Updates the symptoms for a given disease and rewrites the file."""
+        """Updates the symptoms for a given disease, editing only its line in the file."""
         if disease_to_update in self.disease_symptom_map:
             print(f"🔄 Updating knowledge for '{disease_to_update}'...")
             self.disease_symptom_map[disease_to_update] = new_symptoms
-            self._rewrite_knowledge_file()
+            new_line = self._format_knowledge_line(disease_to_update, new_symptoms) if new_symptoms else None
+            if not self._edit_knowledge_line(disease_to_update, new_line):
+                self._rewrite_knowledge_file(self._knowledge_file or 'project AI/knowledge.txt')
         else:
             print(f"⚠️ Attempted to update non-existent disease: {disease_to_update}")
 
     def delete_knowledge(self, disease_to_delete):
-        """Deletes a disease from the knowledge base and rewrites the file."""
+        """Deletes a disease from the knowledge base, blanking only its line in the file."""
         if disease_to_delete in self.disease_symptom_map:
             print(f"🗑️ Deleting knowledge for '{disease_to_delete}'...")
             del self.disease_symptom_map[disease_to_delete]
-            self._rewrite_knowledge_file()
+            if not self._edit_knowledge_line(disease_to_delete, None):
+                self._rewrite_knowledge_file(self._knowledge_file or 'project AI/knowledge.txt')
         else:
             print(f"⚠️ Attempted to delete non-existent disease: {disease_to_delete}")
 
@@ -252,65 +410,171 @@ class MedicalDiagnosisSystem:
         """Query Neo4j for diseases based on symptoms"""
         print(f"🔍 Querying diseases for symptoms: {symptoms}")
         
-        with driver.session() as session:
-            symptom_conditions = " OR ".join([f"s.name='{symptom}'" for symptom in symptoms])
-            query = f"""
+        with get_driver().session(database=NEO4J_DATABASE) as session:
+            # Fixed, parameterized query text so Neo4j reuses its cached plan
+            query = """
                 MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
-                WHERE {symptom_conditions}
+                WHERE s.name IN $symptoms
                 RETURN d.name as disease, collect(s.name) as symptoms
-                ORDER BY size(collect(s.name)) DESC
+                ORDER BY size(symptoms) DESC
             """
             
-            result = session.run(query)
-            diseases = []
-            for record in result:
-                diseases.append({
-                    'disease': record['disease'],
-                    'symptoms': record['symptoms']
-                })
-            
-            return diseases
+            # Keys already match the {'disease', 'symptoms'} rows callers expect
+            return session.run(query, symptoms=list(symptoms)).data()
+    
+    def diagnose_locally(self, symptoms):
+        """Same rows as query_diseases_by_symptoms, answered from disease_symptom_map without a Neo4j round-trip"""
+        selected = frozenset(symptoms)
+        matches = []
+        for disease, disease_symptoms in self.disease_symptom_map.items():
+            matched = [s for s in disease_symptoms if s in selected]
+            if matched:
+                matches.append({'disease': disease, 'symptoms': matched})
+        matches.sort(key=lambda row: len(row['symptoms']), reverse=True)
+        return matches
     
-    def diagnose_with_bayesian_network(self, model, observed_symptoms):
-        """Diagnose using Bayesian Network"""
+    def diagnose_with_bayesian_network(self, model, observed_symptoms, top_k=None):
+        """Diagnose using Bayesian Network
+        
+        Every symptom is observed (present or absent). Up to
+        QUICKSCORE_MAX_PRESENT present symptoms, the noisy-OR posteriors are
+        computed exactly with the Quickscore algorithm instead of running
+        VariableElimination per disease: absent symptoms factor straight into
+        each disease term and only the present ones need inclusion-exclusion,
+        which costs 2^(number of present symptoms) small matrix products.
+        Larger observations run VariableElimination on model.
+        observed_symptoms is an iterable of present symptoms or a
+        {symptom: 0/1} evidence dict.
+        Returns the top_k most likely diseases (all of them by default).
+        """
         print("🧠 Running Bayesian Network analysis...")
         
-        # Prepare evidence for all symptoms
-        evidence = {}
-        for symptom in self.symptoms:
-            evidence[symptom] = 1 if symptom in observed_symptoms else 0
+        diseases = list(self.diseases)
+        symptoms = list(self.symptoms)
+        if isinstance(observed_symptoms, dict):
+            observed = {symptom for symptom, value in observed_symptoms.items() if value}
+        else:
+            observed = set(observed_symptoms)
+        present = [i for i, symptom in enumerate(symptoms) if symptom in observed]
+        absent = [i for i, symptom in enumerate(symptoms) if symptom not in observed]
         
-        # Create inference engine
+        if len(present) > QUICKSCORE_MAX_PRESENT:
+            probs = self._variable_elimination_posteriors(model, diseases, symptoms, observed)
+        else:
+            probs = self._quickscore_posteriors(diseases, symptoms, present, absent)
+        
+        # Sort by probability, only building tuples for the diseases returned
+        order = np.argsort(-probs, kind='stable')[:top_k]
+        return [(diseases[i], round(float(probs[i]) * 100, 2)) for i in order]
+    
+    @staticmethod
+    def _variable_elimination_posteriors(model, diseases, symptoms, observed):
+        """P(disease | evidence) for each disease, by VariableElimination on the model"""
         inference = VariableElimination(model)
+        evidence = {symptom: int(symptom in observed) for symptom in symptoms}
+        return np.array([
+            inference.query([disease], evidence=evidence, show_progress=False).values[1]
+            for disease in diseases
+        ])
+    
+    def _quickscore_posteriors(self, diseases, symptoms, present, absent):
+        """P(disease | evidence) for each disease, by Quickscore over the present symptom indices"""
+        symptom_index = {symptom: i for i, symptom in enumerate(symptoms)}
         
-        # Get probabilities for all diseases
-        results = []
-        for disease in self.diseases:
-            try:
-                query = inference.query(variables=[disease], evidence=evidence)
-                prob = query.values[1]  # Probability of disease = True
-                results.append((disease, round(prob * 100, 2)))
-            except:
-                results.append((disease, 0.0))
-        
-        # Sort by probability
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results
+        # log P(symptom absent | only this parent disease active), leak excluded
+        log_q = np.zeros((len(diseases), len(symptoms)))
+        for d, disease in enumerate(diseases):
+            for symptom in self.disease_symptom_map[disease]:
+                log_q[d, symptom_index[symptom]] = np.log(1.0 - PROB_SYMPTOM_IF_DISEASE)
+        
+        log_q_absent = log_q[:, absent].sum(axis=1)
+        log_q_present = log_q[:, present].T
+        bits = np.arange(len(present))
+        
+        joint = np.zeros(len(diseases))
+        evidence = 0.0
+        for start in range(0, 2 ** len(present), QUICKSCORE_CHUNK):
+            # One row per subset of the present symptoms that is forced absent
+            rows = np.arange(start, min(start + QUICKSCORE_CHUNK, 2 ** len(present)))
+            subsets = (rows[:, None] >> bits) & 1
+            subset_sizes = subsets.sum(axis=1)
+            signs = np.where(subset_sizes % 2, -1.0, 1.0)
+            leak = (1.0 - LEAK_PROBABILITY) ** (len(absent) + subset_sizes)
+            
+            # disease_on[k, d]: P(d active and all symptoms in row k absent via d)
+            disease_on = DISEASE_PRIOR * np.exp(log_q_absent + subsets @ log_q_present)
+            disease_any = (1.0 - DISEASE_PRIOR) + disease_on
+            weights = signs * leak * np.prod(disease_any, axis=1)
+            
+            joint += (weights[:, None] * disease_on / disease_any).sum(axis=0)
+            evidence += weights.sum()
+        
+        # P(disease, evidence) / P(evidence)
+        return joint / evidence
+    
+    def _model_cache_path(self, filename):
+        """Cache file for the current contents of a knowledge file and network parameters"""
+        digest = hashlib.blake2b(repr((
+            MODEL_CACHE_VERSION, DISEASE_PRIOR, LEAK_PROBABILITY,
+            PROB_SYMPTOM_IF_DISEASE, MAX_CPD_PARENTS,
+        )).encode('utf-8'), digest_size=16)
+        with open(filename, 'rb') as file:
+            for chunk in iter(lambda: file.read(KNOWLEDGE_READ_BUFFER), b''):
+                digest.update(chunk)
+        return os.path.join(MODEL_CACHE_DIR, f"{digest.hexdigest()}.pkl")
     
-    def run_complete_system(self):
+    def _load_cached_model(self, cache_path):
+        """Restore the parsed knowledge and return the cached model, or None on a miss; an unreadable cache is deleted"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as file:
+                (self.diseases, self.symptoms, self.disease_symptom_map,
+                 self._line_offsets, self._tombstones, model) = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError) as e:
+            print(f"⚠️ Discarding unreadable model cache {cache_path}: {e}")
+            os.remove(cache_path)
+            return None
+        self._derive_knowledge_views()
+        print(f"⚡ Loaded knowledge and Bayesian Network from cache: {cache_path}")
+        return model
+    
+    def _save_cached_model(self, cache_path, model):
+        """Write the cache atomically so a crash never leaves a partial pickle"""
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            pickle.dump((self.diseases, self.symptoms, self.disease_symptom_map,
+                         self._line_offsets, self._tombstones, model), file)
+        os.replace(tmp_path, cache_path)
+    
+    def run_complete_system(self, filename='project AI/knowledge.txt'):
         """Run the complete medical diagnosis system"""
         print("🚀 Starting Medical Diagnosis System...")
         
         try:
-            # Read and process knowledge
-            knowledge = self.read_knowledge_file()
-            self.process_knowledge(knowledge)
+            # Reuse the processed knowledge and network if the file is unchanged,
+            # otherwise stream the file straight into processing
+            if os.path.exists(filename):
+                cache_path = self._model_cache_path(filename)
+                bayesian_model = self._load_cached_model(cache_path)
+                self._knowledge_file = filename
+            else:
+                print(f"❌ File {filename} not found!")
+                cache_path = bayesian_model = None
+            
+            if bayesian_model is None:
+                print("📖 Reading knowledge from file...")
+                self.process_knowledge(self.iter_knowledge_file(filename) if cache_path else [])
             
             # Setup Neo4j graph
             self.create_neo4j_nodes_and_relationships()
             
-            # Build Bayesian network
-            bayesian_model = self.build_bayesian_network()
+            if bayesian_model is None:
+                # Build Bayesian network
+                bayesian_model = self.build_bayesian_network()
+                if cache_path:
+                    self._save_cached_model(cache_path, bayesian_model)
             
             print("\n✅ System initialization complete!")
             print(f"📊 Knowledge Base: {len(self.diseases)} diseases, {len(self.symptoms)} symptoms")
@@ -324,7 +588,7 @@ class MedicalDiagnosisSystem:
     
     def close_connection(self):
         """Close Neo4j connection"""
-        driver.close()
+        close_driver()
 
 def main():
     # Create and run the medical diagnosis system
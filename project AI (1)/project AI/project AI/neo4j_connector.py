@@ -1,16 +1,39 @@
+from functools import lru_cache
 from neo4j import GraphDatabase
 
 # === CONFIGURATION ===
-NEO4J_URI = "bolt://localhost:7687"
+# neo4j:// lets the driver route and pool connections (works for a single server too)
+NEO4J_URI = "neo4j://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4jneo4j"  # Replace with your password
+# Naming the database up front skips the home-database lookup on each session
+NEO4J_DATABASE = "neo4j"
+# Records pulled per round-trip while a result is streamed
+NEO4J_FETCH_SIZE = 1000
+# Rows per UNWIND statement; bounds transaction memory as the knowledge base grows
+UNWIND_BATCH_SIZE = 1000
 
 # === DRIVER SETUP ===
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# One driver (and connection pool) per process, shared by every module
+@lru_cache(maxsize=None)
+def get_driver():
+    return GraphDatabase.driver(
+        NEO4J_URI,
+        auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=50,
+        connection_acquisition_timeout=30,
+        keep_alive=True,
+        fetch_size=NEO4J_FETCH_SIZE,
+    )
+
+def chunked(rows, size=UNWIND_BATCH_SIZE):
+    """Yield consecutive slices of at most size rows"""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
 
 # === FUNCTION TO CREATE NODES AND RELATIONSHIPS ===
 def create_disease_symptom_relationship(disease, symptom):
-    with driver.session() as session:
+    with get_driver().session(database=NEO4J_DATABASE) as session:
         # Create Disease node if not exists
         session.run("""
             MERGE (d:Disease {name: $disease})
@@ -28,9 +51,20 @@ def create_disease_symptom_relationship(disease, symptom):
             MERGE (d)-[:HAS_SYMPTOM]->(s)
         """, disease=disease, symptom=symptom)
 
+# === FUNCTION TO CREATE MANY RELATIONSHIPS IN ONE ROUND-TRIP ===
+def create_disease_symptom_relationships(rows):
+    with get_driver().session(database=NEO4J_DATABASE) as session:
+        for batch in chunked(rows):
+            session.run("""
+                UNWIND $rows AS r
+                MERGE (d:Disease {name: r.d})
+                MERGE (s:Symptom {name: r.s})
+                MERGE (d)-[:HAS_SYMPTOM]->(s)
+            """, rows=batch)
+
 def test_connection():
     try:
-        with driver.session() as session:
+        with get_driver().session(database=NEO4J_DATABASE) as session:
             result = session.run("RETURN 1 AS test")
             print("✅ Connected to Neo4j! Result:", result.single()["test"])
     except Exception as e:
@@ -39,7 +73,10 @@ def test_connection():
 
 # === Close the driver ===
 def close_driver():
-    driver.close()
+    # Nothing to close if no driver was ever created
+    if get_driver.cache_info().currsize:
+        get_driver().close()
+        get_driver.cache_clear()
 
 if __name__ == "__main__":
     test_connection()
@@ -1,4 +1,5 @@
 from neo4j import GraphDatabase
+from neo4j_connector import NEO4J_DATABASE, NEO4J_PASSWORD, NEO4J_URI, NEO4J_USER, UNWIND_BATCH_SIZE, chunked, get_driver
 from typing import List, Dict, Tuple
 import os
 from dotenv import load_dotenv
@@ -9,15 +10,40 @@ class Neo4jLoader:
         Initialize Neo4j connection. If no credentials provided, uses default values.
         """
         # Use the provided credentials for your database
-        self.uri = uri or 'bolt://localhost:7687'
-        self.user = user or 'neo4j'
-        self.password = password or 'neo4jneo4j'
+        self.uri = uri or NEO4J_URI
+        self.user = user or NEO4J_USER
+        self.password = password or NEO4J_PASSWORD
         
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+        # Default credentials share the process-wide driver and its connection pool
+        self._shared_driver = (self.uri, self.user, self.password) == (NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+        if self._shared_driver:
+            self.driver = get_driver()
+        else:
+            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+
+    def create_constraints(self):
+        """
+        Make disease and symptom names unique. The backing indexes turn every
+        MERGE/MATCH by name into an index seek instead of a label scan.
+        Run once per load, before the bulk write.
+        """
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            session.run(
+                "CREATE CONSTRAINT disease_name IF NOT EXISTS "
+                "FOR (d:Disease) REQUIRE d.name IS UNIQUE"
+            )
+            session.run(
+                "CREATE CONSTRAINT symptom_name IF NOT EXISTS "
+                "FOR (s:Symptom) REQUIRE s.name IS UNIQUE"
+            )
 
     def close(self):
-        """Close the Neo4j driver connection."""
-        self.driver.close()
+        """
+        Close the Neo4j driver connection if this loader created it. The shared
+        driver stays open for other modules; close it with close_driver().
+        """
+        if not self._shared_driver:
+            self.driver.close()
 
     def create_disease_symptom(self, disease: str, symptoms: List[str]):
         """
@@ -27,8 +53,8 @@ class Neo4jLoader:
             disease (str): Name of the disease
             symptoms (List[str]): List of symptoms associated with the disease
         """
-        with self.driver.session() as session:
-            session.write_transaction(self._create_and_link, disease, symptoms)
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            session.execute_write(self._create_and_link, disease, symptoms)
 
     @staticmethod
     def _create_and_link(tx, disease: str, symptoms: List[str]):
@@ -44,6 +70,38 @@ class Neo4jLoader:
         """
         tx.run(query, disease=disease, symptoms=symptoms)
 
+    def bulk_create_disease_symptoms(self, pairs: List[Tuple[str, List[str]]]):
+        """
+        Create many diseases, symptoms and relationships, one transaction per
+        UNWIND_BATCH_SIZE diseases. Every write is a MERGE, so a retried or
+        repeated batch is harmless.
+        
+        Args:
+            pairs (List[Tuple[str, List[str]]]): (disease, symptoms) tuples
+        """
+        rows = [
+            {"disease": disease, "symptoms": symptoms}
+            for disease, symptoms in pairs
+        ]
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            for batch in chunked(rows, UNWIND_BATCH_SIZE):
+                session.execute_write(self._bulk_create_and_link, batch)
+
+    @staticmethod
+    def _bulk_create_and_link(tx, pairs: List[Dict]):
+        """
+        Create a batch of disease and symptom nodes and relationships with one UNWIND query.
+        """
+        query = """
+        UNWIND $pairs AS p
+        MERGE (d:Disease {name: p.disease})
+        WITH d, p
+        UNWIND p.symptoms AS symptom
+        MERGE (s:Symptom {name: symptom})
+        MERGE (d)-[:HAS_SYMPTOM]->(s)
+        """
+        tx.run(query, pairs=pairs)
+
     def get_diseases_by_symptoms(self, symptoms: List[str], threshold: float = 0.5) -> List[Dict]:
         """
         Find diseases that match the given symptoms.
@@ -55,8 +113,8 @@ class Neo4jLoader:
         Returns:
             List[Dict]: List of diseases with matching symptoms and match scores
         """
-        with self.driver.session() as session:
-            return session.read_transaction(self._find_matching_diseases, symptoms, threshold)
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            return session.execute_read(self._find_matching_diseases, symptoms, threshold)
 
     @staticmethod
     def _find_matching_diseases(tx, symptoms: List[str], threshold: float) -> List[Dict]:
@@ -78,8 +136,8 @@ class Neo4jLoader:
 
     def clear_database(self):
         """Remove all nodes and relationships from the database."""
-        with self.driver.session() as session:
-            session.write_transaction(lambda tx: tx.run("MATCH (n) DETACH DELETE n"))
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            session.execute_write(lambda tx: tx.run("MATCH (n) DETACH DELETE n"))
 
     def get_all_symptoms(self) -> List[str]:
         """
@@ -88,11 +146,10 @@ class Neo4jLoader:
         Returns:
             List[str]: List of all symptom names
         """
-        with self.driver.session() as session:
-            result = session.read_transaction(
-                lambda tx: tx.run("MATCH (s:Symptom) RETURN s.name as name")
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            return session.execute_read(
+                lambda tx: tx.run("MATCH (s:Symptom) RETURN s.name as name").value("name")
             )
-            return [record["name"] for record in result]
 
     def get_disease_details(self, disease_name: str) -> Dict:
         """
@@ -104,8 +161,8 @@ class Neo4jLoader:
         Returns:
             Dict: Disease details including all associated symptoms
         """
-        with self.driver.session() as session:
-            result = session.read_transaction(self._get_disease_info, disease_name)
+        with self.driver.session(database=NEO4J_DATABASE) as session:
+            result = session.execute_read(self._get_disease_info, disease_name)
             return result[0] if result else None
 
     @staticmethod
@@ -1,10 +1,25 @@
+import os
 import spacy
 from typing import Tuple, List, Optional
 
+# Texts per spaCy batch, overridable without code changes
+NLP_BATCH_SIZE = int(os.environ.get("MDS_NLP_BATCH_SIZE", "64"))
+
 class MedicalKnowledgeParser:
+    # Symptom recognition only needs tokens, so skip every statistical component
+    UNUSED_PIPES = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+
     def __init__(self):
-        # Load English language model
-        self.nlp = spacy.load("en_core_web_sm")
+        # English language model, loaded on first use
+        self._nlp = None
+        self.known_symptoms = frozenset(["Fever", "Cough", "Fatigue", "Pain"])  # Example symptoms
+    
+    @property
+    def nlp(self):
+        """Tokenizer-only English pipeline, loaded the first time it is needed"""
+        if self._nlp is None:
+            self._nlp = spacy.load("en_core_web_sm", exclude=self.UNUSED_PIPES)
+        return self._nlp
     
     def extract_entities_relations(self, sentence: str) -> Tuple[Optional[str], Optional[List[str]]]:
         """
@@ -51,15 +66,27 @@ class MedicalKnowledgeParser:
         Returns:
             List[str]: List of identified symptoms
         """
-        doc = self.nlp(text)
-        # This is a simple implementation - in a real system, you'd want more sophisticated NLP
-        symptoms = []
-        for token in doc:
-            # Add your symptom recognition logic here
+        return self.parse_patient_symptoms_batch([text])[0]
+
+    def parse_patient_symptoms_batch(self, texts: List[str], batch_size: int = NLP_BATCH_SIZE,
+                                     n_process: int = 1) -> List[List[str]]:
+        """
+        Extract symptoms from many patient descriptions in one spaCy pass.
+        
+        Args:
+            texts (List[str]): Patient symptom descriptions
+            batch_size (int): Number of texts spaCy processes per batch
+            n_process (int): Worker processes for large inputs (1 keeps it in-process)
+            
+        Returns:
+            List[List[str]]: Identified symptoms for each text, in input order
+        """
+        results = []
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            # This is a simple implementation - in a real system, you'd want more sophisticated NLP
             # This could involve named entity recognition, pattern matching, etc.
-            if token.text in ["Fever", "Cough", "Fatigue", "Pain"]:  # Example symptoms
-                symptoms.append(token.text)
-        return symptoms
+            results.append([token.text for token in doc if token.text in self.known_symptoms])
+        return results
 
     def normalize_symptom(self, symptom: str) -> str:
         """
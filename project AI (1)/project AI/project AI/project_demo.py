@@ -4,31 +4,91 @@ Medical Diagnosis System - Complete Project Demo
 Demonstrates all deliverables and functionality
 """
 
-import spacy
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import pickle
 import re
+import sys
 from neo4j import GraphDatabase
 from pgmpy.models import DiscreteBayesianNetwork
 from pgmpy.factors.discrete import TabularCPD
 from pgmpy.inference import VariableElimination
+import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 
 # === CONFIGURATION ===
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "neo4jneo4j"
+# Naming the database skips the home-database lookup on every session
+NEO4J_DATABASE = "neo4j"
 
-# === DRIVER SETUP ===
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# === BAYESIAN NETWORK PARAMETERS ===
+# Diseases with more symptoms than this get their CPD decomposed through a
+# chain of symptom-count variables instead of one 2^k table.
+MAX_CPD_PARENTS = 8
+# P(disease) stops growing at this many present symptoms (0.1 + 0.2 * 4 = 0.9)
+SYMPTOM_COUNT_CAP = 4
+# Part of the network cache key; bump whenever _create_bn_model builds a different model
+BN_CACHE_VERSION = 1
+# Diseases queried together in one elimination pass; pgmpy builds their joint
+# factor (2^n entries) even for marginals, so batches stay small.
+MAX_JOINT_QUERY_DISEASES = 12
+
+# === KNOWLEDGE EXTRACTION ===
+# Compiled once: "Disease has symptoms Symptom1, Symptom2"
+HAS_PATTERN = re.compile(r'(\w+)\s+has\s+symptoms?\s+(.+)', re.IGNORECASE)
 
-# === NLP SETUP ===
-nlp = spacy.load("en_core_web_sm")
+# int.bit_count() is Python 3.10+; older versions count the binary digits
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:
+    def popcount(n):
+        return bin(n).count('1')
+
+# Set bits in every byte value, for popcounts over packed bit rows
+BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# === DRIVER SETUP ===
+driver = GraphDatabase.driver(
+    NEO4J_URI,
+    auth=(NEO4J_USER, NEO4J_PASSWORD),
+    max_connection_pool_size=50,
+    connection_acquisition_timeout=60,
+    keep_alive=True,
+)
 
 class ProjectDemo:
-    def __init__(self):
+    def __init__(self, query_neo4j=False, reset_graph=False):
         self.diseases = set()
         self.symptoms = set()
         self.disease_symptom_map = {}
+        # Symptom bit and per-disease symptom bitmask, so symptom queries can
+        # be answered in memory with one AND + popcount per disease
+        self._symptom_bits = {}
+        self._disease_masks = {}
+        # Send symptom queries to Neo4j instead of the in-memory index
+        self.query_neo4j = query_neo4j
+        # Wipe the whole graph before loading instead of syncing it incrementally
+        self.reset_graph = reset_graph
         self.bn_model = None
+        self.inference = None
+        # Disease x symptom incidence bits (one packed row per disease) for the
+        # closed-form diagnosis path
+        self._diagnosis_diseases = []
+        self._diagnosis_symptoms = []
+        self._incidence = None
+        # Diagnosis results keyed by (observed symptom set, use_pgmpy)
+        self._diagnosis_cache = {}
+        # Workers for independent inference queries (threads start on first use)
+        self._pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        # One long-lived session shared by every demo task
+        self._session = driver.session(database=NEO4J_DATABASE)
         
     def run_complete_demo(self):
         """Run the complete project demonstration"""
@@ -39,20 +99,33 @@ class ProjectDemo:
         print("=" * 60)
         
         # Demo all tasks
-        self.demo_task1_setup()
-        self.demo_task2_neo4j_connection()
-        self.demo_task3_text_processing()
-        self.demo_task4_nlp_extraction()
-        self.demo_task5_neo4j_queries()
-        self.demo_task6_bayesian_network()
-        self.demo_task7_knowledge_graph_queries()
-        self.demo_task8_optimization()
+        for task in (
+            self.demo_task1_setup,
+            self.demo_task2_neo4j_connection,
+            self.demo_task3_text_processing,
+            self.demo_task4_nlp_extraction,
+            self.demo_task5_neo4j_queries,
+            self.demo_task6_bayesian_network,
+            self.demo_task7_knowledge_graph_queries,
+            self.demo_task8_optimization,
+        ):
+            self._run_buffered(task)
         
         print("\n" + "=" * 60)
         print("🎉 PROJECT DEMO COMPLETE!")
         print("✅ All deliverables implemented and tested")
         print("=" * 60)
     
+    def _run_buffered(self, task):
+        """Run a demo task, writing its output to stdout in one call"""
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer):
+                task()
+        finally:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+    
     def demo_task1_setup(self):
         """Demo Task 1: Setup and Installation"""
         print("\n📦 TASK 1: Setup and Installation")
@@ -69,11 +142,11 @@ class ProjectDemo:
         print("-" * 40)
         
         try:
-            with driver.session() as session:
-                result = session.run("RETURN 'Connected to Neo4j!' as status")
-                status = result.single()["status"]
-                print(f"✅ {status}")
-                print("✅ Knowledge Graph ready for population")
+            session = self._session
+            result = session.run("RETURN 'Connected to Neo4j!' as status")
+            status = result.single()["status"]
+            print(f"✅ {status}")
+            print("✅ Knowledge Graph ready for population")
         except Exception as e:
             print(f"❌ Connection failed: {e}")
     
@@ -83,15 +156,16 @@ class ProjectDemo:
         print("-" * 40)
         
         try:
-            with open('knowledge.txt', 'r', encoding='utf-8') as file:
-                knowledge = file.readlines()
+            knowledge = self.knowledge_lines
+            samples = knowledge[:3]
+            line_count = len(knowledge)
             
-            print(f"✅ Knowledge file loaded: {len(knowledge)} lines")
+            print(f"✅ Knowledge file loaded: {line_count} lines")
             print("📋 Sample knowledge entries:")
-            for i, line in enumerate(knowledge[:3], 1):
+            for i, line in enumerate(samples, 1):
                 print(f"   {i}. {line.strip()}")
-            if len(knowledge) > 3:
-                print(f"   ... and {len(knowledge) - 3} more entries")
+            if line_count > 3:
+                print(f"   ... and {line_count - 3} more entries")
                 
         except Exception as e:
             print(f"❌ File processing failed: {e}")
@@ -102,8 +176,7 @@ class ProjectDemo:
         print("-" * 40)
         
         # Process knowledge and extract entities
-        knowledge = self.read_knowledge_file()
-        self.process_knowledge(knowledge)
+        self.process_knowledge(self.knowledge_lines)
         
         print(f"✅ Extracted {len(self.diseases)} diseases")
         print(f"✅ Extracted {len(self.symptoms)} symptoms")
@@ -122,20 +195,19 @@ class ProjectDemo:
         self.create_neo4j_graph()
         
         # Test queries
-        with driver.session() as session:
-            # Count nodes
-            result = session.run("MATCH (d:Disease) RETURN count(d) as disease_count")
-            disease_count = result.single()["disease_count"]
-            
-            result = session.run("MATCH (s:Symptom) RETURN count(s) as symptom_count")
-            symptom_count = result.single()["symptom_count"]
-            
-            result = session.run("MATCH ()-[r:HAS_SYMPTOM]->() RETURN count(r) as relationship_count")
-            relationship_count = result.single()["relationship_count"]
-            
-            print(f"✅ Created {disease_count} disease nodes")
-            print(f"✅ Created {symptom_count} symptom nodes")
-            print(f"✅ Created {relationship_count} relationships")
+        session = self._session
+        # Count nodes and relationships in a single round-trip
+        result = session.run("""
+            CALL { MATCH (d:Disease) RETURN count(d) as disease_count }
+            CALL { MATCH (s:Symptom) RETURN count(s) as symptom_count }
+            CALL { MATCH ()-[r:HAS_SYMPTOM]->() RETURN count(r) as relationship_count }
+            RETURN disease_count, symptom_count, relationship_count
+        """)
+        disease_count, symptom_count, relationship_count = result.single().values()
+        
+        print(f"✅ Created {disease_count} disease nodes")
+        print(f"✅ Created {symptom_count} symptom nodes")
+        print(f"✅ Created {relationship_count} relationships")
     
     def demo_task6_bayesian_network(self):
         """Demo Task 6: Bayesian Network Implementation"""
@@ -172,7 +244,7 @@ class ProjectDemo:
         
         for i, symptoms in enumerate(test_cases, 1):
             print(f"📋 Test Case {i}: Symptoms = {symptoms}")
-            diseases = self.query_diseases_by_symptoms(symptoms)
+            diseases = self.find_diseases(symptoms)
             
             if diseases:
                 print(f"   Found {len(diseases)} potential diseases:")
@@ -197,17 +269,24 @@ class ProjectDemo:
         
         # Performance test
         start_time = time.time()
-        self.query_diseases_by_symptoms(['Fever'])
+        self.find_diseases(['Fever'])
         query_time = time.time() - start_time
         print(f"⚡ Query performance: {query_time:.3f} seconds")
     
+    @cached_property
+    def knowledge_lines(self):
+        """Knowledge file lines, read from disk once and shared by the demo tasks"""
+        return list(self.read_knowledge_file())
+    
     def read_knowledge_file(self, filename='knowledge.txt'):
-        """Read knowledge from text file"""
+        """Stream non-empty knowledge lines from text file"""
         try:
             with open(filename, 'r', encoding='utf-8') as file:
-                return file.readlines()
+                for line in file:
+                    if line.strip():
+                        yield line
         except FileNotFoundError:
-            return []
+            return
     
     def extract_entities_and_relationships(self, sentence):
         """Extract diseases and symptoms from sentence using NLP"""
@@ -215,8 +294,7 @@ class ProjectDemo:
         symptoms = []
         
         # Pattern matching for medical knowledge
-        has_pattern = r'(\w+)\s+has\s+symptoms?\s+(.+)'
-        match = re.search(has_pattern, sentence, re.IGNORECASE)
+        match = HAS_PATTERN.search(sentence)
         
         if match:
             disease = match.group(1).strip()
@@ -228,51 +306,142 @@ class ProjectDemo:
     def process_knowledge(self, knowledge_lines):
         """Process knowledge lines and extract entities"""
         for line in knowledge_lines:
-            if line.strip():
-                disease, symptoms = self.extract_entities_and_relationships(line)
-                if disease and symptoms:
-                    self.diseases.add(disease)
-                    for symptom in symptoms:
-                        self.symptoms.add(symptom)
-                    self.disease_symptom_map[disease] = symptoms
+            stripped = line.strip()
+            if not stripped:
+                continue
+            disease, symptoms = self.extract_entities_and_relationships(stripped)
+            if disease and symptoms:
+                self.diseases.add(disease)
+                for symptom in symptoms:
+                    self.symptoms.add(symptom)
+                self.disease_symptom_map[disease] = symptoms
+        
+        self._symptom_bits = {symptom: 1 << i for i, symptom in enumerate(sorted(self.symptoms))}
+        self._disease_masks = {}
+        for disease, symptoms in self.disease_symptom_map.items():
+            mask = 0
+            for symptom in symptoms:
+                mask |= self._symptom_bits[symptom]
+            self._disease_masks[disease] = mask
     
     def create_neo4j_graph(self):
         """Create Neo4j knowledge graph"""
-        with driver.session() as session:
-            # Clear existing data
-            session.run("MATCH (n) DETACH DELETE n")
+        diseases = [{"name": disease} for disease in self.diseases]
+        symptoms = [{"name": symptom} for symptom in self.symptoms]
+        edges = [
+            {"d": disease, "s": symptom}
+            for disease, disease_symptoms in self.disease_symptom_map.items()
+            for symptom in disease_symptoms
+        ]
+        
+        session = self._session
+        # Unique names first, so every MERGE/MATCH below is a seek, not a label
+        # scan (same constraints as the other loaders sharing this database)
+        session.run("CREATE CONSTRAINT disease_name IF NOT EXISTS FOR (d:Disease) REQUIRE d.name IS UNIQUE")
+        session.run("CREATE CONSTRAINT symptom_name IF NOT EXISTS FOR (s:Symptom) REQUIRE s.name IS UNIQUE")
+        
+        # Sync nodes and relationships with the knowledge in one transaction
+        tx = session.begin_transaction()
+        try:
+            if self.reset_graph:
+                tx.run("MATCH (n) DETACH DELETE n")
             
             # Create disease and symptom nodes
-            for disease in self.diseases:
-                session.run("CREATE (d:Disease {name: $disease})", disease=disease)
+            tx.run("UNWIND $rows AS r MERGE (:Disease {name: r.name})", rows=diseases)
+            tx.run("UNWIND $rows AS r MERGE (:Symptom {name: r.name})", rows=symptoms)
             
-            for symptom in self.symptoms:
-                session.run("CREATE (s:Symptom {name: $symptom})", symptom=symptom)
+            # Create relationships (MERGE keeps re-runs from duplicating edges)
+            tx.run("""
+                UNWIND $rows AS r
+                MATCH (d:Disease {name: r.d})
+                MATCH (s:Symptom {name: r.s})
+                MERGE (d)-[:HAS_SYMPTOM]->(s)
+            """, rows=edges)
             
-            # Create relationships
-            for disease, symptoms in self.disease_symptom_map.items():
-                for symptom in symptoms:
-                    session.run("""
-                        MATCH (d:Disease {name: $disease})
-                        MATCH (s:Symptom {name: $symptom})
-                        CREATE (d)-[:HAS_SYMPTOM]->(s)
-                    """, disease=disease, symptom=symptom)
+            if not self.reset_graph:
+                # Remove only what is no longer in the knowledge
+                tx.run("""
+                    MATCH (d:Disease)-[r:HAS_SYMPTOM]->(s:Symptom)
+                    WHERE NOT s.name IN coalesce($symptoms_by_disease[d.name], [])
+                    DELETE r
+                """, symptoms_by_disease=self.disease_symptom_map)
+                tx.run("MATCH (d:Disease) WHERE NOT d.name IN $names DETACH DELETE d",
+                       names=list(self.diseases))
+                tx.run("MATCH (s:Symptom) WHERE NOT s.name IN $names DETACH DELETE s",
+                       names=list(self.symptoms))
+            tx.commit()
+        finally:
+            tx.close()
     
     def build_bayesian_network(self):
         """Build Bayesian Network for medical diagnosis"""
-        # Create edges
-        edges = []
-        for disease in self.diseases:
-            for symptom in self.symptoms:
-                if symptom in self.disease_symptom_map.get(disease, []):
-                    edges.append((symptom, disease))
+        # The network is a pure function of the knowledge, so reuse a pickled copy
+        cache_file = self._bn_cache_path()
+        self.bn_model = None
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'rb') as f:
+                    self.bn_model = pickle.load(f)
+            except Exception as e:
+                print(f"Discarding unreadable network cache {cache_file}: {e}")
+                os.remove(cache_file)
+        if self.bn_model is None:
+            self.bn_model = self._create_bn_model()
+            # Atomic write, so an interrupted dump never leaves a partial pickle
+            tmp_file = f"{cache_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(self.bn_model, f)
+            os.replace(tmp_file, cache_file)
         
-        # Create model
-        self.bn_model = DiscreteBayesianNetwork(edges)
+        # The network is fixed once built, so one inference engine serves every query
+        self.inference = VariableElimination(self.bn_model)
+        self._diagnosis_cache.clear()
+        
+        # Every disease's parents are observed symptoms, so its posterior is just
+        # its CPD entry for the number of present symptoms
+        self._diagnosis_diseases = sorted(self.diseases)
+        self._diagnosis_symptoms = sorted(self.symptoms)
+        symptom_index = {symptom: i for i, symptom in enumerate(self._diagnosis_symptoms)}
+        incidence = np.zeros((len(self._diagnosis_diseases), len(self._diagnosis_symptoms)), dtype=bool)
+        for d, disease in enumerate(self._diagnosis_diseases):
+            for symptom in self.disease_symptom_map.get(disease, []):
+                incidence[d, symptom_index[symptom]] = True
+        self._incidence = np.packbits(incidence, axis=1)
+    
+    def _bn_cache_path(self):
+        """Pickle file for the network built from the current knowledge"""
+        knowledge = repr((BN_CACHE_VERSION, MAX_CPD_PARENTS, SYMPTOM_COUNT_CAP,
+                          sorted(self.disease_symptom_map.items())))
+        key = hashlib.sha256(knowledge.encode('utf-8')).hexdigest()[:16]
+        return f".bn_cache_{key}.pkl"
+    
+    def _create_bn_model(self):
+        """Create the network structure and CPDs from the extracted knowledge"""
+        # Create edges, one pass over each disease's own symptoms
+        symptom_sets = {
+            disease: frozenset(symptoms)
+            for disease, symptoms in self.disease_symptom_map.items()
+        }
+        edges = [
+            (symptom, disease)
+            for disease, disease_symptoms in self.disease_symptom_map.items()
+            if len(symptom_sets[disease]) <= MAX_CPD_PARENTS
+            for symptom in dict.fromkeys(disease_symptoms)
+        ]
         
         # Create CPDs
         cpds = []
         
+        # Large diseases: count present symptoms along a chain, O(k) table size
+        for disease, disease_symptoms in self.disease_symptom_map.items():
+            if len(symptom_sets[disease]) > MAX_CPD_PARENTS:
+                chain_edges, chain_cpds = self._symptom_count_chain(disease, disease_symptoms)
+                edges.extend(chain_edges)
+                cpds.extend(chain_cpds)
+        
+        # Create model
+        model = DiscreteBayesianNetwork(edges)
+        
         # Symptom CPDs
         for symptom in self.symptoms:
             cpd = TabularCPD(variable=symptom, variable_card=2, values=[[0.8], [0.2]])
@@ -281,55 +450,136 @@ class ProjectDemo:
         # Disease CPDs
         for disease in self.diseases:
             disease_symptoms = self.disease_symptom_map.get(disease, [])
-            if disease_symptoms:
+            if disease_symptoms and len(symptom_sets[disease]) <= MAX_CPD_PARENTS:
                 evidence = disease_symptoms
                 evidence_card = [2] * len(evidence)
                 
-                values = []
-                for i in range(2 ** len(evidence)):
-                    binary = format(i, f'0{len(evidence)}b')
-                    symptom_values = [int(bit) for bit in binary]
-                    symptom_count = sum(symptom_values)
-                    
-                    if symptom_count > 0:
-                        prob_disease = min(0.9, 0.1 + 0.2 * symptom_count)
-                    else:
-                        prob_disease = 0.05
-                    
-                    values.append([1 - prob_disease, prob_disease])
+                # Number of present symptoms in every evidence-state column at once
+                k = len(evidence)
+                states = np.arange(2 ** k, dtype=np.uint32)
+                symptom_count = ((states[:, None] >> np.arange(k - 1, -1, -1, dtype=np.uint32)) & 1).sum(axis=1)
                 
-                values = list(zip(*values))
+                prob_disease = np.where(symptom_count > 0, np.minimum(0.9, 0.1 + 0.2 * symptom_count), 0.05)
+                values = np.stack([1 - prob_disease, prob_disease])
                 cpd = TabularCPD(variable=disease, variable_card=2,
                                values=values, evidence=evidence, evidence_card=evidence_card)
                 cpds.append(cpd)
         
-        self.bn_model.add_cpds(*cpds)
+        model.add_cpds(*cpds)
+        return model
+    
+    def _symptom_count_chain(self, disease, symptoms):
+        """Edges and CPDs linking symptoms to a disease through running-count variables
+        
+        P(disease | symptoms) only depends on how many symptoms are present, so
+        count_j = min(count_{j-1} + symptom_j, SYMPTOM_COUNT_CAP) is tracked one
+        symptom at a time and the disease depends on the final count alone.
+        """
+        symptoms = list(dict.fromkeys(symptoms))
+        n_counts = SYMPTOM_COUNT_CAP + 1
+        counts = np.arange(n_counts)
+        
+        edges = []
+        cpds = []
+        previous = None
+        for j, symptom in enumerate(symptoms):
+            count_var = f"{disease}__count{j}"
+            if previous is None:
+                # First count is just the first symptom's state
+                new_count = np.array([0, 1])
+                evidence, evidence_card = [symptom], [2]
+            else:
+                # Columns ordered (previous count, symptom), symptom varying fastest
+                new_count = np.minimum(np.repeat(counts, 2) + np.tile([0, 1], n_counts), SYMPTOM_COUNT_CAP)
+                evidence, evidence_card = [previous, symptom], [n_counts, 2]
+                edges.append((previous, count_var))
+            edges.append((symptom, count_var))
+            values = (counts[:, None] == new_count[None, :]).astype(float)
+            cpds.append(TabularCPD(variable=count_var, variable_card=n_counts, values=values,
+                                   evidence=evidence, evidence_card=evidence_card))
+            previous = count_var
+        
+        edges.append((previous, disease))
+        prob_disease = np.where(counts > 0, np.minimum(0.9, 0.1 + 0.2 * counts), 0.05)
+        cpds.append(TabularCPD(variable=disease, variable_card=2,
+                               values=np.stack([1 - prob_disease, prob_disease]),
+                               evidence=[previous], evidence_card=[n_counts]))
+        return edges, cpds
+    
+    def find_diseases(self, symptoms):
+        """Diseases matching the symptoms, most matches first"""
+        if self.query_neo4j:
+            return self.query_diseases_by_symptoms(symptoms)
+        return self.query_diseases_local(symptoms)
+    
+    def query_diseases_local(self, symptoms):
+        """Answer query_diseases_by_symptoms from the in-memory symptom bitmasks"""
+        symptoms = [symptom for symptom in dict.fromkeys(symptoms) if symptom in self._symptom_bits]
+        query_mask = 0
+        for symptom in symptoms:
+            query_mask |= self._symptom_bits[symptom]
+        
+        scored = []
+        for disease, mask in self._disease_masks.items():
+            matched_mask = mask & query_mask
+            if matched_mask:
+                scored.append((popcount(matched_mask), disease, matched_mask))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        
+        return [
+            {'disease': disease,
+             'symptoms': [s for s in symptoms if matched_mask & self._symptom_bits[s]]}
+            for _, disease, matched_mask in scored
+        ]
     
     def query_diseases_by_symptoms(self, symptoms):
         """Query Neo4j for diseases based on symptoms"""
-        with driver.session() as session:
-            symptom_conditions = " OR ".join([f"s.name='{symptom}'" for symptom in symptoms])
-            query = f"""
-                MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
-                WHERE {symptom_conditions}
-                RETURN d.name as disease, collect(s.name) as symptoms
-                ORDER BY size(collect(s.name)) DESC
-            """
-            
-            result = session.run(query)
-            diseases = []
-            for record in result:
-                diseases.append({
-                    'disease': record['disease'],
-                    'symptoms': record['symptoms']
-                })
-            
-            return diseases
+        session = self._session
+        query = """
+            MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
+            WHERE s.name IN $symptoms
+            RETURN d.name as disease, collect(s.name) as symptoms
+            ORDER BY size(symptoms) DESC
+        """
+        
+        result = session.run(query, symptoms=list(symptoms))
+        diseases = []
+        for record in result:
+            diseases.append({
+                'disease': record['disease'],
+                'symptoms': record['symptoms']
+            })
+        
+        return diseases
+    
+    def diagnose_fast(self, observed_symptoms):
+        """Bayesian Network diagnosis in closed form: one AND + popcount per disease row"""
+        observed = np.packbits(np.isin(self._diagnosis_symptoms, list(observed_symptoms)))
+        counts = BYTE_POPCOUNT[self._incidence & observed].sum(axis=1)
+        probs = np.where(counts > 0, np.minimum(0.9, 0.1 + 0.2 * counts), 0.05)
+        order = np.argsort(-probs, kind='stable')
+        return [(self._diagnosis_diseases[i], float(probs[i])) for i in order]
     
-    def diagnose_with_bayesian_network(self, observed_symptoms):
-        """Use Bayesian Network for diagnosis"""
+    def diagnose_with_bayesian_network(self, observed_symptoms, use_pgmpy=False):
+        """Use Bayesian Network for diagnosis (closed form unless use_pgmpy is set)"""
+        # Results only depend on which symptoms are present, so repeats are lookups
+        key = (frozenset(observed_symptoms), use_pgmpy)
+        cached = self._diagnosis_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        if use_pgmpy:
+            results = self._diagnose_with_inference(observed_symptoms)
+        else:
+            results = self.diagnose_fast(observed_symptoms)
+        if results:
+            self._diagnosis_cache[key] = tuple(results)
+        return results
+    
+    def _diagnose_with_inference(self, observed_symptoms):
+        """Diagnosis by variable elimination over the pgmpy network"""
         try:
-            inference = VariableElimination(self.bn_model)
+            inference = self.inference
             
             evidence = {}
             for symptom in self.symptoms:
@@ -339,13 +589,26 @@ class ProjectDemo:
                     evidence[symptom] = 0
             
             diagnosis_results = {}
-            for disease in self.diseases:
+            diseases = list(self.diseases)
+            batches = [
+                diseases[start:start + MAX_JOINT_QUERY_DISEASES]
+                for start in range(0, len(diseases), MAX_JOINT_QUERY_DISEASES)
+            ]
+            # Batches are independent queries, so run them side by side
+            futures = [
+                (batch, self._pool.submit(
+                    inference.query, variables=batch, evidence=evidence, joint=False, show_progress=False
+                ))
+                for batch in batches
+            ]
+            for batch, future in futures:
                 try:
-                    query_result = inference.query(variables=[disease], evidence=evidence)
-                    prob_disease = query_result.values[1]
-                    diagnosis_results[disease] = prob_disease
+                    marginals = future.result()
+                    for disease in batch:
+                        diagnosis_results[disease] = marginals[disease].values[1]
                 except Exception:
-                    diagnosis_results[disease] = 0.0
+                    for disease in batch:
+                        diagnosis_results[disease] = 0.0
             
             return sorted(diagnosis_results.items(), key=lambda x: x[1], reverse=True)
             
@@ -355,10 +618,17 @@ class ProjectDemo:
     
     def close_connection(self):
         """Close Neo4j connection"""
+        self._pool.shutdown()
+        self._session.close()
         driver.close()
 
 def main():
-    demo = ProjectDemo()
+    parser = argparse.ArgumentParser(description="Medical Diagnosis System - Complete Project Demo")
+    parser.add_argument("--reset", action="store_true",
+                        help="delete the whole Neo4j graph before loading the knowledge")
+    args = parser.parse_args()
+    
+    demo = ProjectDemo(reset_graph=args.reset)
     
     try:
         demo.run_complete_demo()
@@ -1,16 +1,8 @@
-import re
-from neo4j import GraphDatabase
-from pgmpy.models import DiscreteBayesianNetwork
-from pgmpy.factors.discrete import TabularCPD
-from pgmpy.inference import VariableElimination
+from neo4j_connector import NEO4J_DATABASE, chunked, close_driver, get_driver
 
-# === CONFIGURATION ===
-NEO4J_URI = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "neo4jneo4j"
-
-# === DRIVER SETUP ===
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# === KNOWLEDGE EXTRACTION ===
+# Lines read "Disease has symptoms Symptom1, Symptom2" (or "has symptom")
+HAS_SYMPTOM_MARKER = " has symptom"
 
 class SimpleDiagnosisSystem:
     def __init__(self):
@@ -19,31 +11,36 @@ class SimpleDiagnosisSystem:
         self.disease_symptom_map = {}
         
     def read_knowledge_file(self, filename='knowledge.txt'):
-        """Read knowledge from text file"""
+        """Stream knowledge lines from text file, one at a time"""
         print("📖 Reading knowledge from file...")
+        count = 0
         try:
             with open(filename, 'r', encoding='utf-8') as file:
-                knowledge = file.readlines()
-            print(f"✅ Successfully read {len(knowledge)} lines from {filename}")
-            return knowledge
+                for line in file:
+                    count += 1
+                    yield line
+            print(f"✅ Successfully read {count} lines from {filename}")
         except FileNotFoundError:
             print(f"❌ File {filename} not found!")
-            return []
     
     def extract_entities_and_relationships(self, sentence):
-        """Extract diseases and symptoms from sentence using regex"""
-        disease = None
-        symptoms = []
-        
+        """Extract diseases and symptoms from sentence with plain string scanning"""
         # Pattern: "Disease has symptoms Symptom1, Symptom2"
-        has_pattern = r'(\w+)\s+has\s+symptoms?\s+(.+)'
-        match = re.search(has_pattern, sentence, re.IGNORECASE)
+        marker = sentence.lower().find(HAS_SYMPTOM_MARKER)
+        if marker == -1:
+            return None, []
         
-        if match:
-            disease = match.group(1).strip()
-            symptoms_text = match.group(2).strip()
-            symptoms = [s.strip() for s in symptoms_text.split(',')]
+        # Skip past "has symptom" and an optional plural "s"
+        start = marker + len(HAS_SYMPTOM_MARKER)
+        if sentence[start:start + 1] in ('s', 'S'):
+            start += 1
         
+        disease = sentence[:marker].strip()
+        symptoms_text = sentence[start:].strip()
+        if not disease or not symptoms_text or not sentence[start:start + 1].isspace():
+            return None, []
+        
+        symptoms = [s.strip() for s in symptoms_text.split(',')]
         return disease, symptoms
     
     def process_knowledge(self, knowledge_lines):
@@ -51,14 +48,17 @@ class SimpleDiagnosisSystem:
         print("🔍 Processing knowledge...")
         
         for line in knowledge_lines:
-            if line.strip():
-                disease, symptoms = self.extract_entities_and_relationships(line)
-                if disease and symptoms:
-                    self.diseases.add(disease)
-                    for symptom in symptoms:
-                        self.symptoms.add(symptom)
-                    self.disease_symptom_map[disease] = symptoms
-                    print(f"📋 Found: {disease} -> {symptoms}")
+            stripped = line.strip()
+            if not stripped:
+                continue
+            disease, symptoms = self.extract_entities_and_relationships(stripped)
+            if disease and symptoms:
+                self.diseases.add(disease)
+                for symptom in symptoms:
+                    self.symptoms.add(symptom)
+                # Merge repeated disease lines, keeping first-seen symptom order
+                existing = self.disease_symptom_map.get(disease, [])
+                self.disease_symptom_map[disease] = list(dict.fromkeys(existing + symptoms))
         
         print(f"✅ Extracted {len(self.diseases)} diseases and {len(self.symptoms)} symptoms")
     
@@ -66,60 +66,57 @@ class SimpleDiagnosisSystem:
         """Create nodes and relationships in Neo4j"""
         print("🗄️ Creating Neo4j knowledge graph...")
         
-        with driver.session() as session:
-            # Clear existing data
-            session.run("MATCH (n) DETACH DELETE n")
-            print("🧹 Cleared existing data")
-            
-            # Create disease and symptom nodes
-            for disease in self.diseases:
-                session.run("""
-                    CREATE (d:Disease {name: $disease})
-                """, disease=disease)
-            
-            for symptom in self.symptoms:
-                session.run("""
-                    CREATE (s:Symptom {name: $symptom})
-                """, symptom=symptom)
+        pairs = [
+            {"d": disease, "s": symptom}
+            for disease, disease_symptoms in self.disease_symptom_map.items()
+            for symptom in disease_symptoms
+        ]
+        
+        with get_driver().session(database=NEO4J_DATABASE) as session:
+            # Unique names; the backing indexes turn the MERGEs below into seeks
+            session.run("CREATE CONSTRAINT disease_name IF NOT EXISTS FOR (d:Disease) REQUIRE d.name IS UNIQUE")
+            session.run("CREATE CONSTRAINT symptom_name IF NOT EXISTS FOR (s:Symptom) REQUIRE s.name IS UNIQUE")
             
-            # Create relationships
-            for disease, symptoms in self.disease_symptom_map.items():
-                for symptom in symptoms:
-                    session.run("""
-                        MATCH (d:Disease {name: $disease})
-                        MATCH (s:Symptom {name: $symptom})
-                        CREATE (d)-[:HAS_SYMPTOM]->(s)
-                    """, disease=disease, symptom=symptom)
+            # Clear existing data and recreate the graph in a single commit
+            session.execute_write(self._ingest_tx, pairs)
+            print("🧹 Cleared existing data")
             
             print(f"✅ Created {len(self.diseases)} disease nodes, {len(self.symptoms)} symptom nodes, and relationships")
     
+    @staticmethod
+    def _ingest_tx(tx, pairs):
+        """Replace the graph with Disease-[:HAS_SYMPTOM]->Symptom pairs in one transaction"""
+        tx.run("MATCH (n) DETACH DELETE n")
+        
+        # Every disease has at least one symptom, so the pairs cover all nodes
+        for batch in chunked(pairs):
+            tx.run("""
+                UNWIND $pairs AS p
+                MERGE (d:Disease {name: p.d})
+                MERGE (s:Symptom {name: p.s})
+                MERGE (d)-[:HAS_SYMPTOM]->(s)
+            """, pairs=batch)
+    
     def query_diseases_by_symptoms(self, symptoms):
         """Query Neo4j for diseases based on symptoms"""
         print(f"🔍 Querying diseases for symptoms: {symptoms}")
         
-        with driver.session() as session:
-            # Build query for multiple symptoms
-            symptom_conditions = " OR ".join([f"s.name='{symptom}'" for symptom in symptoms])
-            query = f"""
+        with get_driver().session(database=NEO4J_DATABASE) as session:
+            # One parameterized query for any number of symptoms
+            query = """
                 MATCH (d:Disease)-[:HAS_SYMPTOM]->(s:Symptom)
-                WHERE {symptom_conditions}
-                RETURN d.name as disease, collect(s.name) as symptoms
-                ORDER BY size(collect(s.name)) DESC
+                WHERE s.name IN $symptoms
+                WITH d, collect(s.name) as symptoms
+                RETURN d.name as disease, symptoms
+                ORDER BY size(symptoms) DESC
             """
             
-            result = session.run(query)
-            diseases = []
-            for record in result:
-                diseases.append({
-                    'disease': record['disease'],
-                    'symptoms': record['symptoms']
-                })
-            
-            return diseases
+            # Keys already match the {'disease', 'symptoms'} rows callers expect
+            return session.run(query, symptoms=list(symptoms)).data()
     
     def close_connection(self):
         """Close Neo4j connection"""
-        driver.close()
+        close_driver()
 
 def main():
     # Create and run the simple diagnosis system
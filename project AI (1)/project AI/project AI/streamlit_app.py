@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from medical_diagnosis_system import MedicalDiagnosisSystem
+import os
 import time
 
 # Page configuration
@@ -16,6 +17,9 @@ st.set_page_config(
 # --- Admin Configuration ---
 ADMIN_PASSWORD = "admin" 
 
+# --- Knowledge Base ---
+KNOWLEDGE_FILE = 'project AI/knowledge.txt'
+
 # --- Custom CSS for a new modern dark theme ---
 st.markdown("""
 <style>
@@ -175,13 +179,19 @@ if 'user_role' not in st.session_state:
 if 'widget_key_id' not in st.session_state:
     st.session_state.widget_key_id = 0
 
+@st.cache_data(show_spinner=False)
+def load_knowledge(path, mtime_ns):
+    """Parse the knowledge file once per version; mtime_ns only keys the cache so admin edits invalidate it"""
+    mds = MedicalDiagnosisSystem()
+    mds.process_knowledge(mds.read_knowledge_file(path))
+    return mds
+
 def initialize_system(force_reload=False):
     """Initialize or reload the medical diagnosis system"""
     spinner_text = "🔄 Reloading Medical Diagnosis System..." if force_reload else "🔄 Initializing Medical Diagnosis System..."
     with st.spinner(spinner_text):
-        mds = MedicalDiagnosisSystem()
-        knowledge = mds.read_knowledge_file('project AI/knowledge.txt')
-        mds.process_knowledge(knowledge)
+        # Each call hands back a fresh copy, so edits never leak into the cache
+        mds = load_knowledge(KNOWLEDGE_FILE, os.stat(KNOWLEDGE_FILE).st_mtime_ns)
         mds.create_neo4j_nodes_and_relationships()
         bayesian_model = mds.build_bayesian_network()
         
@@ -302,29 +312,30 @@ def show_dashboard():
     
     with col1:
         st.subheader("🏥 Sample Diseases")
-        sample_diseases = sorted(list(st.session_state.mds.diseases))[:10]
+        sample_diseases = st.session_state.mds.sorted_diseases[:10]
+        # One markdown call for all cards: a single frontend update instead of one per card
+        cards = []
         for disease in sample_diseases:
             symptoms = st.session_state.mds.disease_symptom_map.get(disease, [])
-            st.markdown(f'''
+            cards.append(f'''
                 <div class="info-card">
                     <strong>{disease}</strong><br>
                     <small style="color: #a0a0b0;">Common symptoms: {", ".join(symptoms[:3])}...</small>
                 </div>
-            ''', unsafe_allow_html=True)
+            ''')
+        st.markdown("".join(cards), unsafe_allow_html=True)
     
     with col2:
         st.subheader("🤒 Common Symptoms")
-        sample_symptoms = sorted(list(st.session_state.mds.symptoms))[:15]
-        symptoms_html = ""
-        for symptom in sample_symptoms:
-            symptoms_html += f'<span class="symptom-tag">{symptom}</span>'
+        sample_symptoms = st.session_state.mds.sorted_symptoms[:15]
+        symptoms_html = "".join(f'<span class="symptom-tag">{symptom}</span>' for symptom in sample_symptoms)
         st.markdown(f'<div class="symptom-tag-container">{symptoms_html}</div>', unsafe_allow_html=True)
 
 def show_diagnosis():
     """Show the diagnosis interface"""
     st.markdown('<h2 class="section-header">🔍 Start Diagnosis</h2>', unsafe_allow_html=True)
     
-    all_symptoms = sorted(list(st.session_state.mds.symptoms))
+    all_symptoms = st.session_state.mds.sorted_symptoms
     
     selected_symptoms = st.multiselect(
         "Select your symptoms from the list below:",
@@ -340,9 +351,12 @@ def show_diagnosis():
             </div>
         ''', unsafe_allow_html=True)
         
+        selected_set = frozenset(selected_symptoms)
+        
         if st.button("🔬 Run Diagnosis", type="primary", key="run_diagnosis"):
             with st.spinner("🧠 Analyzing symptoms with AI..."):
-                neo4j_results = st.session_state.mds.query_diseases_by_symptoms(selected_symptoms)
+                # The graph mirrors disease_symptom_map, so matching needs no Bolt round-trip
+                neo4j_results = st.session_state.mds.diagnose_locally(selected_symptoms)
                 bayesian_results = st.session_state.mds.diagnose_with_bayesian_network(
                     st.session_state.bayesian_model, selected_symptoms
                 )
@@ -355,11 +369,12 @@ def show_diagnosis():
                 if bayesian_results:
                     top_results = bayesian_results[:7]
                     
+                    cards = []
                     for disease, prob in top_results:
                         disease_symptoms = st.session_state.mds.disease_symptom_map.get(disease, [])
-                        matching_symptoms = set(disease_symptoms).intersection(set(selected_symptoms))
+                        matching_symptoms = [s for s in disease_symptoms if s in selected_set]
                         
-                        st.markdown(f'''
+                        cards.append(f'''
                             <div class="diagnosis-result-card">
                                 <div style="display: flex; justify-content: space-between; align-items: center;">
                                     <strong style="font-size: 1.2rem;">{disease}</strong>
@@ -373,15 +388,17 @@ def show_diagnosis():
                                     {", ".join(matching_symptoms)}</span>
                                 </div>
                             </div>
-                        ''', unsafe_allow_html=True)
+                        ''')
+                    st.markdown("".join(cards), unsafe_allow_html=True)
                 else:
                     st.markdown('<div class="message-box warning-message">⚠️ No Bayesian analysis results available.</div>', unsafe_allow_html=True)
 
             with results_tab2:
                 if neo4j_results:
+                    cards = []
                     for i, result in enumerate(neo4j_results[:5], 1):
                         disease = result['disease']
-                        matched_symptoms = set(result['symptoms']).intersection(set(selected_symptoms))
+                        matched_symptoms = selected_set.intersection(result['symptoms'])
                         
                         # Get all symptoms for the disease to calculate an accurate percentage
                         all_symptoms_for_disease = st.session_state.mds.disease_symptom_map.get(disease, [])
@@ -391,7 +408,7 @@ def show_diagnosis():
                         else:
                             match_percentage = 0
                         
-                        st.markdown(f'''
+                        cards.append(f'''
                             <div class="info-card">
                                 <strong style="font-size: 1.1rem;">{i}. {disease}</strong>
                                 <small style="float: right; color: #a0a0b0;">{match_percentage:.1f}% symptom match</small>
@@ -400,7 +417,8 @@ def show_diagnosis():
                                 Matching symptoms: {", ".join(matched_symptoms)}
                                 </span>
                             </div>
-                        ''', unsafe_allow_html=True)
+                        ''')
+                    st.markdown("".join(cards), unsafe_allow_html=True)
                 else:
                     st.markdown('<div class="message-box warning-message">⚠️ No diseases found with these symptoms in the knowledge graph.</div>', unsafe_allow_html=True)
 
@@ -412,11 +430,7 @@ def show_statistics():
     
     with col1:
         st.subheader("Diseases by Symptom Count")
-        disease_symptom_counts = sorted(
-            [(d, len(s)) for d, s in st.session_state.mds.disease_symptom_map.items()],
-            key=lambda x: x[1], reverse=True
-        )
-        df_diseases = pd.DataFrame(disease_symptom_counts, columns=['Disease', 'Symptom Count'])
+        df_diseases = pd.DataFrame(st.session_state.mds.disease_symptom_counts, columns=['Disease', 'Symptom Count'])
         
         fig = px.bar(df_diseases.head(15), x='Symptom Count', y='Disease', orientation='h',
                      color='Symptom Count', color_continuous_scale='Teal')
@@ -425,8 +439,7 @@ def show_statistics():
 
     with col2:
         st.subheader("Most Common Symptoms")
-        symptom_freq = pd.Series([s for sym_list in st.session_state.mds.disease_symptom_map.values() for s in sym_list]).value_counts()
-        df_symptoms = pd.DataFrame({'Symptom': symptom_freq.index, 'Frequency': symptom_freq.values}).head(15)
+        df_symptoms = pd.DataFrame(st.session_state.mds.symptom_frequency.most_common(15), columns=['Symptom', 'Frequency'])
         
         fig2 = px.pie(df_symptoms, values='Frequency', names='Symptom', hole=0.4,
                       color_discrete_sequence=px.colors.sequential.Teal_r)